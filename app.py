@@ -3,20 +3,40 @@ import pandas as pd
 from datetime import date, timedelta
 from config.settings import DEFAULT_INTERVAL, DEFAULT_START_DAYS
 from indicators.technicals import compute_indicators
-from backtest.strategies import run_crossover, compute_metrics
-from data_sources import yahoo, alpha_vantage, polygon, finnhub
-from utils.plotting import plot_price, plot_rsi, plot_macd, plot_equity
+from backtest.strategies import run_crossover, compute_metrics, run_crossover_sweep
+from backtest.portfolio import run_portfolio
+from data_sources import load_many
+from utils.plotting import plot_price, plot_rsi, plot_macd, plot_equity, plot_sweep_heatmap, cached_figure
+from utils import instrumentation
 
-# Import AI models
-from ml_models.lstm_model import train_lstm, predict_future_lstm
-from ml_models.transformer_model import train_transformer
-from ml_models.baseline_models import train_linear_regression, train_random_forest
+# AI model backends are imported lazily on first selection
+from ml_models import BACKENDS, get_backend
+from ml_models import registry as model_registry
 
 st.set_page_config(page_title="Market Trend Analyzer", layout="wide")
+
+# sidebar label -> (data_sources provider, secrets key)
+SOURCES = {
+    "Yahoo Finance": ("yahoo", None),
+    "Alpha Vantage": ("alpha_vantage", "alpha"),
+    "Polygon": ("polygon", "polygon"),
+    "Finnhub": ("finnhub", "finnhub"),
+}
+
+@st.cache_data(show_spinner="Fetching market data...")
+def load_all(provider, tickers, start, end, interval, api_key=""):
+    frames, errors = load_many(provider, tickers, start, end, interval, api_key=api_key)
+    return frames, {t: str(e) for t, e in errors.items()}
+
+@st.cache_resource(show_spinner="Training global model...")
+def train_global_model(arch, frames, embed, epochs, batch_size, num_workers):
+    return get_backend("Global LSTM").train_global(frames, arch=arch, epochs=epochs, batch_size=batch_size,
+                                                   embed_dim=8 if embed else 0, num_workers=num_workers)
+
 st.sidebar.title("Market Trend Analyzer")
 
 # --- Sidebar: data source & basic inputs ---
-source = st.sidebar.selectbox("Data Source", ["Yahoo Finance", "Alpha Vantage", "Polygon (placeholder)", "Finnhub (placeholder)"])
+source = st.sidebar.selectbox("Data Source", list(SOURCES))
 tickers_input = st.sidebar.text_input("Tickers (comma-separated)", "AAPL, RELIANCE.NS")
 tickers = [t.strip().upper() for t in tickers_input.split(",") if t.strip()]
 
@@ -27,7 +47,19 @@ interval = st.sidebar.selectbox("Interval", DEFAULT_INTERVAL, index=0)
 
 # --- AI Predictions block moved above Indicators ---
 st.sidebar.subheader("AI Predictions")
-ai_model_choice = st.sidebar.selectbox("Choose AI Model", ["None", "LSTM", "Transformer", "Linear Regression", "Random Forest"])
+ai_model_choice = st.sidebar.selectbox("Choose AI Model", ["None", *BACKENDS])
+with st.sidebar.expander("Global model"):
+    global_embed = st.checkbox("Learn a ticker embedding", value=True)
+    global_epochs = st.number_input("Epochs", min_value=1, max_value=50, value=5, step=1)
+    global_batch = st.select_slider("Batch size", options=[256, 512, 1024, 2048, 4096], value=1024)
+    global_workers = st.number_input("Data loader workers", min_value=0, max_value=16, value=2, step=1)
+with st.sidebar.expander("Saved Models"):
+    saved_models = model_registry.list_entries()
+    st.caption(f"{len(saved_models)} models, {sum(m.get('bytes', 0) for m in saved_models) / 1e6:.1f} MB")
+    if saved_models:
+        st.dataframe(pd.DataFrame(saved_models)[["ticker", "kind", "interval", "n_rows", "fine_tunes"]], use_container_width=True)
+    if st.button("Purge saved models"):
+        model_registry.purge()
 
 st.sidebar.markdown('---')
 st.sidebar.subheader("Indicators")
@@ -44,6 +76,34 @@ fast_ma = st.sidebar.number_input("Fast MA", min_value=2, max_value=200, value=1
 slow_ma = st.sidebar.number_input("Slow MA", min_value=2, max_value=400, value=30, step=1)
 initial_capital = st.sidebar.number_input("Initial Capital", min_value=1000, value=10000, step=500)
 
+with st.sidebar.expander("Parameter Sweep"):
+    run_sweep = st.checkbox("Sweep fast/slow MA grid", value=False)
+    sweep_fast = st.slider("Fast MA range", min_value=2, max_value=200, value=(5, 50))
+    sweep_slow = st.slider("Slow MA range", min_value=2, max_value=400, value=(20, 200))
+    sweep_step = st.number_input("Step", min_value=1, max_value=50, value=1, step=1)
+    sweep_metric = st.selectbox("Rank by", ["sharpe", "cagr", "final_equity", "max_drawdown", "win_rate"])
+
+with st.sidebar.expander("Portfolio Backtest"):
+    run_book = st.checkbox("Backtest all tickers as one portfolio", value=False)
+    book_sizing = st.selectbox("Sizing", ["equal", "vol_target"])
+    book_target_vol = st.slider("Target volatility (vol_target)", min_value=0.02, max_value=0.50, value=0.10, step=0.01)
+    book_rebalance = st.selectbox("Rebalance", ["1d", "1wk", "1mo", "3mo"], index=2)
+    book_commission = st.number_input("Commission (bps)", min_value=0.0, max_value=100.0, value=1.0, step=0.5)
+    book_slippage = st.number_input("Slippage (bps)", min_value=0.0, max_value=100.0, value=5.0, step=0.5)
+    book_long_only = st.checkbox("Long only", value=False)
+
+# timings are recorded per browser session, not into the process-wide default recorder
+instrumentation.use(st.session_state.setdefault("perf_recorder", instrumentation.Recorder()))
+with st.sidebar.expander("Performance"):
+    show_perf = st.checkbox("Record stage timings", value=instrumentation.is_enabled())
+    track_memory = st.checkbox("Track peak allocations (slower)", value=False)
+
+if show_perf:
+    instrumentation.enable(track_memory=track_memory)
+    instrumentation.reset()
+else:
+    instrumentation.disable()
+
 if st.sidebar.button("Load / Refresh Data", use_container_width=True):
     st.session_state["data_loaded"] = True
 
@@ -53,24 +113,32 @@ if "data_loaded" not in st.session_state:
 st.title("📈 Market Trend Analyzer")
 st.caption("Educational demo. Not investment advice.")
 
-# --- Loop through tickers ---
-for ticker in tickers:
-    if st.session_state["data_loaded"]:
-        if source == "Yahoo Finance":
-            df = yahoo.load_data(ticker, start, end, interval)
-        elif source == "Alpha Vantage":
-            df = alpha_vantage.load_data(ticker, start, end, interval, api_key=st.secrets.get("api_keys", {}).get("alpha",""))
-        elif source.startswith("Polygon"):
-            df = polygon.load_data(ticker, start, end, interval, api_key=st.secrets.get("api_keys",{}).get("polygon",""))
-        elif source.startswith("Finnhub"):
-            df = finnhub.load_data(ticker, start, end, interval, api_key=st.secrets.get("api_keys",{}).get("finnhub",""))
-        else:
-            df = pd.DataFrame()
-    else:
-        df = pd.DataFrame()
+# --- Fetch all tickers concurrently, then render each ---
+frames, load_errors = {}, {}
+if st.session_state["data_loaded"] and tickers:
+    provider, secret = SOURCES[source]
+    api_key = st.secrets.get("api_keys", {}).get(secret, "") if secret else ""
+    with instrumentation.stage("load_all", rows=len(tickers)):
+        frames, load_errors = load_all(provider, tuple(tickers), start, end, interval, api_key=api_key)
+
+# --- Global model: one training run and one batched forecast for every loaded ticker ---
+global_preds, global_forecast = {}, None
+if ai_model_choice in ("Global LSTM", "Global Transformer") and frames:
+    arch = "lstm" if ai_model_choice == "Global LSTM" else "transformer"
+    try:
+        global_model, global_preds, global_scalers, global_ids = train_global_model(
+            arch, frames, global_embed, int(global_epochs), int(global_batch), int(global_workers))
+        global_forecast = get_backend(ai_model_choice).forecast_global(
+            global_model, {t: frames[t]["Close"] for t in global_ids}, global_scalers, global_ids, lookback=60, days=7)
+    except ValueError as exc:
+        st.warning(f"Global model not trained: {exc}")
 
+for ticker in tickers:
+    instrumentation.set_ticker(ticker)
+    df = frames.get(ticker, pd.DataFrame())
     if df.empty:
-        st.warning(f"No data for {ticker}. Check ticker, date range, API key, or chosen data source.")
+        reason = load_errors.get(ticker)
+        st.warning(f"No data for {ticker}. " + (reason or "Check ticker, date range, API key, or chosen data source."))
         continue
 
     data = compute_indicators(df, sma=sma_window, ema=ema_window, rsi=rsi_window,
@@ -79,25 +147,33 @@ for ticker in tickers:
     st.header(f"📊 {ticker} Analysis")
 
     st.subheader(f"{ticker} Price with Simple & Exponential Moving Averages")
-    st.plotly_chart(plot_price(data, sma_window, ema_window), use_container_width=True)
+    st.plotly_chart(cached_figure(plot_price, data, sma_window, ema_window), use_container_width=True)
 
     st.subheader("Relative Strength Index (RSI)")
-    st.plotly_chart(plot_rsi(data, rsi_window), use_container_width=True)
+    st.plotly_chart(cached_figure(plot_rsi, data, rsi_window), use_container_width=True)
 
     st.subheader("Moving Average Convergence Divergence (MACD)")
-    st.plotly_chart(plot_macd(data), use_container_width=True)
+    st.plotly_chart(cached_figure(plot_macd, data), use_container_width=True)
 
     bt = run_crossover(data, fast_ma=fast_ma, slow_ma=slow_ma, initial_capital=initial_capital)
     st.subheader("Backtest Equity Curve")
-    st.plotly_chart(plot_equity(bt), use_container_width=True)
+    st.plotly_chart(cached_figure(plot_equity, bt), use_container_width=True)
 
-    metrics = compute_metrics(bt)
+    metrics = compute_metrics(bt, interval=interval)
     c1, c2, c3, c4 = st.columns(4)
     c1.metric("Final Equity", f"${bt['equity'].iloc[-1]:,.2f}")
     c2.metric("Max Drawdown", f"{metrics['max_drawdown']:.2%}" if not pd.isna(metrics['max_drawdown']) else "n/a")
     c3.metric("CAGR (approx.)", f"{metrics['cagr']:.2%}" if not pd.isna(metrics['cagr']) else "n/a")
     c4.metric("Win Rate", f"{metrics['win_rate']:.1%}" if not pd.isna(metrics['win_rate']) else "n/a")
 
+    if run_sweep:
+        sweep = run_crossover_sweep(data, fast_range=range(sweep_fast[0], sweep_fast[1] + 1, sweep_step),
+                                    slow_range=range(sweep_slow[0], sweep_slow[1] + 1, sweep_step),
+                                    initial_capital=initial_capital, interval=interval, rank_by=sweep_metric)
+        st.subheader(f"Parameter Sweep (ranked by {sweep_metric})")
+        st.dataframe(sweep.head(20), use_container_width=True)
+        st.plotly_chart(plot_sweep_heatmap(sweep, sweep_metric), use_container_width=True)
+
     # --- Safe handling of latest signal ---
     latest = bt.iloc[-1].to_dict()
     fast_val = latest.get("fast", float("nan"))
@@ -108,8 +184,10 @@ for ticker in tickers:
     # --- AI Predictions ---
     if ai_model_choice != "None":
         st.subheader(f"AI Prediction using {ai_model_choice}")
-        if ai_model_choice == "LSTM":
-            model, preds, scaler = train_lstm(data)
+        if ai_model_choice in ("LSTM", "Transformer") and len(data) <= 60:
+            st.warning(f"{ticker} has too few bars for the {ai_model_choice} model (lookback 60).")
+        elif ai_model_choice == "LSTM":
+            model, preds, scaler = model_registry.get_or_train("lstm", data, ticker, interval)
             preds_series = pd.Series(preds, index=data.index[-len(preds):], name="Predicted")
             actual_series = pd.Series(
                 data["Close"].iloc[-len(preds):].values,
@@ -121,12 +199,12 @@ for ticker in tickers:
             st.line_chart(df_preds)
 
             # Future forecast (7 days)
-            future_preds = predict_future_lstm(model, data["Close"], scaler, lookback=60, days=7)
+            future_preds = get_backend("LSTM").predict_future_lstm(model, data["Close"], scaler, lookback=60, days=7)
             future_series = pd.Series(future_preds, index=pd.RangeIndex(len(future_preds)), name="Future")
             st.subheader("📈 LSTM Future Forecast (Next 7 Days)")
             st.line_chart(future_series)
         elif ai_model_choice == "Transformer":
-            _, preds, _ = train_transformer(data)
+            model, preds, scaler = model_registry.get_or_train("transformer", data, ticker, interval)
             preds_series = pd.Series(preds, index=data.index[-len(preds):], name="Predicted")
             actual_series = pd.Series(
                 data["Close"].iloc[-len(preds):].values,
@@ -136,15 +214,38 @@ for ticker in tickers:
             df_preds = pd.concat([actual_series, preds_series], axis=1)
             st.subheader("📉 Actual vs Predicted (Transformer)")
             st.line_chart(df_preds)
+
+            future_preds = get_backend("Transformer").predict_future_transformer(model, data["Close"], scaler, lookback=60, days=7)
+            future_series = pd.Series(future_preds, index=pd.RangeIndex(len(future_preds)), name="Future")
+            st.subheader("📈 Transformer Future Forecast (Next 7 Days)")
+            st.line_chart(future_series)
+        elif ai_model_choice in ("Global LSTM", "Global Transformer"):
+            preds = global_preds.get(ticker)
+            if preds is None:
+                st.warning(f"{ticker} has too few bars for the global model (lookback 60).")
+            else:
+                preds_series = pd.Series(preds, index=data.index[-len(preds):], name="Predicted")
+                actual_series = pd.Series(
+                    data["Close"].iloc[-len(preds):].values,
+                    index=data.index[-len(preds):],
+                    name="Actual"
+                )
+                df_preds = pd.concat([actual_series, preds_series], axis=1)
+                st.subheader(f"📉 Actual vs Predicted ({ai_model_choice})")
+                st.line_chart(df_preds)
+
+                future_series = pd.Series(global_forecast.loc[ticker].to_numpy(), name="Future")
+                st.subheader(f"📈 {ai_model_choice} Future Forecast (Next 7 Days)")
+                st.line_chart(future_series)
         elif ai_model_choice == "Linear Regression":
-            _, preds = train_linear_regression(data)
+            _, preds = get_backend("Linear Regression").train_linear_regression(data)
             preds_series = pd.Series(preds, index=data.index, name="Predicted")
             actual_series = data["Close"].rename("Actual")
             df_preds = pd.concat([actual_series, preds_series], axis=1)
             st.subheader("📉 Actual vs Predicted (Linear Regression)")
             st.line_chart(df_preds)
         elif ai_model_choice == "Random Forest":
-            _, preds = train_random_forest(data)
+            _, preds = get_backend("Random Forest").train_random_forest(data)
             preds_series = pd.Series(preds, index=data.index, name="Predicted")
             actual_series = data["Close"].rename("Actual")
             df_preds = pd.concat([actual_series, preds_series], axis=1)
@@ -157,3 +258,36 @@ for ticker in tickers:
     st.download_button(f"Download {ticker} backtest CSV", data=bt[export_existing].to_csv().encode('utf-8'), file_name=f"{ticker}_backtest.csv", mime='text/csv')
 
     st.markdown("---")
+
+instrumentation.set_ticker(None)
+if run_book and frames:
+    st.header("💼 Portfolio Backtest")
+    book, book_weights, attribution = run_portfolio(
+        frames, fast_ma=fast_ma, slow_ma=slow_ma, sizing=book_sizing, target_vol=book_target_vol,
+        rebalance=book_rebalance, commission_bps=book_commission, slippage_bps=book_slippage,
+        long_only=book_long_only, initial_capital=initial_capital, interval=interval)
+    st.plotly_chart(cached_figure(plot_equity, book), use_container_width=True)
+    book_metrics = compute_metrics(book, interval=interval)
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Final Equity", f"${book['equity'].iloc[-1]:,.2f}")
+    c2.metric("Max Drawdown", f"{book_metrics['max_drawdown']:.2%}" if not pd.isna(book_metrics['max_drawdown']) else "n/a")
+    c3.metric("CAGR (approx.)", f"{book_metrics['cagr']:.2%}" if not pd.isna(book_metrics['cagr']) else "n/a")
+    c4.metric("Sharpe", f"{book_metrics['sharpe']:.2f}" if not pd.isna(book_metrics['sharpe']) else "n/a")
+    st.caption(f"Costs paid: {book['costs'].sum():.2%} of equity over {int((book['turnover'] > 0).sum())} rebalances")
+    st.subheader("Attribution by asset")
+    st.dataframe(attribution, use_container_width=True)
+    st.subheader("Latest weights")
+    # a plain name: Altair parses the text after a colon in the default Timestamp name as an encoding type
+    st.bar_chart(book_weights.iloc[-1].rename("weight"))
+
+if show_perf:
+    st.header("⏱️ Performance")
+    perf = instrumentation.summary()
+    if perf:
+        st.dataframe(pd.DataFrame(perf), use_container_width=True)
+        with st.expander("Per-call records"):
+            st.dataframe(pd.DataFrame(instrumentation.records()), use_container_width=True)
+        st.download_button("Download Prometheus metrics", data=instrumentation.to_prometheus().encode('utf-8'),
+                           file_name="market_trend_metrics.prom", mime='text/plain')
+    else:
+        st.caption("Nothing recorded yet (cached results skip the instrumented stages).")
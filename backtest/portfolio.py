@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from backtest.strategies import PERIODS_PER_YEAR
+from indicators.technicals import close_matrix
+from utils.instrumentation import instrument
+
+SIZING = ('equal', 'vol_target')
+REBALANCE = {'1wk': 'W', '1mo': 'M', '3mo': 'Q'}
+
+
+def _rebalance_mask(index, rebalance):
+    """Bars at whose close the book is traded back to target: every bar, every N bars or the first bar of each period."""
+    n = len(index)
+    mask = np.zeros(n, dtype=bool)
+    if rebalance in (None, 1, '1d'):
+        mask[:] = True
+    elif isinstance(rebalance, (int, np.integer)):
+        mask[::int(rebalance)] = True
+    elif rebalance in REBALANCE:
+        idx = pd.DatetimeIndex(index)
+        periods = (idx.tz_localize(None) if idx.tz is not None else idx).to_period(REBALANCE[rebalance]).asi8
+        mask[1:] = periods[1:] != periods[:-1]
+    else:
+        raise ValueError(f"Unknown rebalance schedule: {rebalance}")
+    mask[:1] = True
+    return mask
+
+
+def _target_weights(close, returns, signal, sizing, target_vol, vol_window, max_weight, max_leverage, periods_per_year):
+    available = close.notna().to_numpy()
+    n_avail = np.maximum(available.sum(axis=1, keepdims=True), 1)
+    if sizing == 'equal':
+        target = signal / n_avail
+    elif sizing == 'vol_target':
+        vol = returns.rolling(int(vol_window)).std().to_numpy() * np.sqrt(periods_per_year)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.where(vol > 0, target_vol / vol, 0.0)
+        # each asset aims for an equal share of the portfolio volatility target
+        target = signal * np.nan_to_num(scale) / n_avail
+    else:
+        raise ValueError(f"Unknown sizing: {sizing}")
+    if max_weight is not None:
+        target = np.clip(target, -max_weight, max_weight)
+    gross = np.abs(target).sum(axis=1, keepdims=True)
+    return target * np.where(gross > max_leverage, max_leverage / np.maximum(gross, 1e-12), 1.0)
+
+
+@instrument()
+def run_portfolio(prices, fast_ma=10, slow_ma=30, sizing='equal', target_vol=0.10, vol_window=20, rebalance='1d',
+                  commission_bps=1.0, slippage_bps=5.0, long_only=False, max_weight=None, max_leverage=1.0,
+                  initial_capital=10000, interval='1d'):
+    """
+    Backtest the run_crossover signal on many assets as one book; returns (bt, weights, attribution).
+
+    prices is a time x ticker close matrix (or anything compute_indicators_panel accepts). Target
+    weights are signal / N ('equal') or scaled to an annualised `target_vol` per asset ('vol_target'),
+    capped by max_weight and max_leverage; they are set at the close of each rebalance bar and drift
+    with prices in between. Commission and slippage are charged in bps of traded notional.
+
+    bt has per-bar gross 'returns', 'costs', net 'strategy' returns, 'equity', 'turnover' and
+    'position' (gross exposure), so compute_metrics(bt, interval) applies unchanged. weights holds the
+    end-of-bar weights per asset; attribution sums each asset's return contribution, costs and turnover.
+    With equal sizing, daily rebalancing and zero costs the book is the average of the per-asset
+    run_crossover strategies. Everything is computed on (time x assets) arrays with no per-bar loop.
+    """
+    close = close_matrix(prices).astype(float)
+    tickers, index = close.columns, close.index
+    if close.empty:
+        empty = pd.DataFrame(index=index)
+        return empty, pd.DataFrame(index=index, columns=tickers), pd.DataFrame(index=tickers)
+
+    fast = close.ewm(span=int(fast_ma), adjust=False).mean().to_numpy()
+    slow = close.ewm(span=int(slow_ma), adjust=False).mean().to_numpy()
+    signal = np.sign(fast - slow)
+    signal[np.isnan(signal) | close.isna().to_numpy()] = 0.0
+    if long_only:
+        signal = np.maximum(signal, 0.0)
+
+    # gaps (a market closed while others trade) carry the last price, i.e. earn nothing
+    returns = close.ffill().pct_change().fillna(0.0)
+    periods_per_year = PERIODS_PER_YEAR.get(interval, 252)
+    target = _target_weights(close, returns, signal, sizing, target_vol, vol_window, max_weight, max_leverage,
+                             periods_per_year)
+
+    R = returns.to_numpy()
+    reb = _rebalance_mask(index, rebalance)
+    n = len(index)
+    t = np.arange(n)
+    last_reb = np.maximum.accumulate(np.where(reb, t, 0))
+    seg = np.concatenate(([0], last_reb[:-1]))  # rebalance bar whose weights are held over bar t
+
+    # value of each holding per unit of portfolio value at the segment's rebalance: W * growth since then
+    log_growth = np.cumsum(np.log1p(np.maximum(R, -1 + 1e-12)), axis=0)
+    W = target[seg]
+    V = W * np.exp(log_growth - log_growth[seg])
+    P = 1.0 - W.sum(axis=1) + V.sum(axis=1)
+    V[0], P[0] = 0.0, 1.0
+
+    prev_reb = np.concatenate(([True], reb[:-1]))
+    P_prev = np.where(prev_reb, 1.0, np.concatenate(([1.0], P[:-1])))
+    V_prev = np.where(prev_reb[:, None], W, np.vstack([np.zeros((1, V.shape[1])), V[:-1]]))
+    contrib = (V - V_prev) / P_prev[:, None]
+    contrib[0] = 0.0
+    gross_ret = P / P_prev - 1.0
+
+    drifted = V / P[:, None]
+    trades = np.where(reb[:, None], np.abs(target - drifted), 0.0)
+    cost_rate = (commission_bps + slippage_bps) / 1e4
+    costs = trades * cost_rate
+    held = np.where(reb[:, None], target, drifted)
+
+    # costs are paid out of the bar's closing value, just before the book is traded back to target
+    net = (1.0 + gross_ret) * (1.0 - costs.sum(axis=1)) - 1.0
+    bt = pd.DataFrame({
+        'returns': gross_ret,
+        'costs': costs.sum(axis=1),
+        'strategy': net,
+        'equity': initial_capital * np.cumprod(1.0 + net),
+        'turnover': trades.sum(axis=1),
+        'position': np.abs(held).sum(axis=1),
+    }, index=index)
+    weights = pd.DataFrame(held, index=index, columns=tickers)
+    attribution = pd.DataFrame({
+        'contribution': contrib.sum(axis=0),
+        'costs': costs.sum(axis=0),
+        'net': contrib.sum(axis=0) - costs.sum(axis=0),
+        'turnover': trades.sum(axis=0),
+        'avg_weight': held.mean(axis=0),
+    }, index=tickers).sort_values('net', ascending=False)
+    return bt, weights, attribution
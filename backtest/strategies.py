@@ -1,6 +1,11 @@
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from utils.instrumentation import instrument
 
+PERIODS_PER_YEAR = {'1d':252,'1wk':52,'1mo':12,'1h':252*7,'60m':252*7,'30m':252*13,'15m':252*26,'5m':252*78,'1m':252*390}
+
+@instrument()
 def run_crossover(data, fast_ma=10, slow_ma=30, initial_capital=10000):
     bt = data.copy()
     if 'Close' not in bt.columns:
@@ -16,6 +21,7 @@ def run_crossover(data, fast_ma=10, slow_ma=30, initial_capital=10000):
     bt['equity'] = (1 + bt['strategy']).cumprod() * initial_capital
     return bt
 
+@instrument()
 def compute_metrics(bt, interval='1d'):
     metrics = {}
     # max drawdown
@@ -27,7 +33,7 @@ def compute_metrics(bt, interval='1d'):
         metrics['max_drawdown'] = np.nan
 
     # cagr approximation
-    periods_per_year = {'1d':252,'1wk':52,'1mo':12}.get(interval,252)
+    periods_per_year = PERIODS_PER_YEAR.get(interval,252)
     if 'equity' in bt.columns and len(bt) > 1:
         total_return = bt['equity'].iloc[-1] / bt['equity'].iloc[0] - 1
         years = len(bt) / periods_per_year
@@ -42,4 +48,99 @@ def compute_metrics(bt, interval='1d'):
     else:
         metrics['win_rate'] = np.nan
 
+    # annualised sharpe ratio of per-bar strategy returns (risk-free rate of 0)
+    if 'strategy' in bt.columns and len(bt) > 1:
+        std = bt['strategy'].std()
+        metrics['sharpe'] = bt['strategy'].mean() / std * np.sqrt(periods_per_year) if std > 0 else np.nan
+    else:
+        metrics['sharpe'] = np.nan
+
     return metrics
+
+def _ewm_columns(values, spans):
+    """
+    ewm(span=s, adjust=False).mean() of a 1-D series for every span at once, shape (len(values), len(spans)).
+    Loops over time with vectors across spans using pandas' own recurrence, so results match run_crossover bit for bit.
+    """
+    spans = np.asarray(spans, dtype=float)
+    alpha = 1. / (1. + (spans - 1) / 2.)
+    old_wt = 1. - alpha
+    out = np.empty((len(values), len(spans)))
+    weighted = np.full(len(spans), values[0], dtype=float)
+    out[0] = weighted
+    for i in range(1, len(values)):
+        cur = values[i]
+        weighted = np.where(weighted != cur, (old_wt * weighted + alpha * cur) / (old_wt + alpha), weighted)
+        out[i] = weighted
+    return out
+
+def _sweep_block(fast_ema, slow_ema, returns, initial_capital, periods_per_year):
+    """Equity curves and metrics for every (fast column, slow column) pair, as flat arrays ordered fast-major."""
+    n, n_fast = fast_ema.shape
+    n_slow = slow_ema.shape[1]
+    signal = np.sign(fast_ema[:, :, None] - slow_ema[:, None, :]).reshape(n, n_fast * n_slow)
+    position = np.zeros_like(signal)
+    position[1:] = signal[:-1]
+    strategy = position * returns[:, None]
+    equity = np.cumprod(1 + strategy, axis=0) * initial_capital
+
+    drawdown = (equity / np.maximum.accumulate(equity, axis=0) - 1).min(axis=0)
+    years = n / periods_per_year
+    if n > 1 and years > 0:
+        cagr = (1 + (equity[-1] / equity[0] - 1)) ** (1 / years) - 1
+    else:
+        cagr = np.full(equity.shape[1], np.nan)
+    in_trade = position != 0
+    wins = ((strategy > 0) & in_trade).sum(axis=0)
+    win_rate = wins / np.maximum(1, ((strategy != 0) & in_trade).sum(axis=0))
+    if n > 1:
+        std = strategy.std(axis=0, ddof=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(std > 0, strategy.mean(axis=0) / std * np.sqrt(periods_per_year), np.nan)
+    else:
+        sharpe = np.full(equity.shape[1], np.nan)
+    return equity[-1], drawdown, cagr, win_rate, sharpe
+
+def _sweep_chunk(close, fast_spans, slow_ema, returns, initial_capital, periods_per_year, max_cells=5_000_000):
+    fast_ema = _ewm_columns(close, fast_spans)
+    per_fast = len(close) * slow_ema.shape[1]
+    step = max(1, int(max_cells // max(1, per_fast)))
+    parts = [_sweep_block(fast_ema[:, i:i + step], slow_ema, returns, initial_capital, periods_per_year)
+             for i in range(0, len(fast_spans), step)]
+    return [np.concatenate(col) for col in zip(*parts)]
+
+@instrument()
+def run_crossover_sweep(data, fast_range=range(5, 51), slow_range=range(20, 201, 5), initial_capital=10000,
+                        interval='1d', rank_by='sharpe', fast_below_slow=True, n_jobs=1):
+    """
+    Backtest every (fast_ma, slow_ma) pair of run_crossover in one vectorised pass over 2-D arrays.
+    Returns one row per pair with the compute_metrics statistics, ranked by `rank_by` (best first).
+    n_jobs > 1 splits the fast spans across a process pool, which pays off for long intraday series.
+    """
+    columns = ['fast_ma', 'slow_ma', 'final_equity', 'max_drawdown', 'cagr', 'win_rate', 'sharpe']
+    fast_spans = np.array(sorted({int(s) for s in fast_range}), dtype=int)
+    slow_spans = np.array(sorted({int(s) for s in slow_range}), dtype=int)
+    if 'Close' not in data.columns or len(data) == 0 or not len(fast_spans) or not len(slow_spans):
+        return pd.DataFrame(columns=columns)
+
+    close = data['Close'].to_numpy(dtype=float)
+    returns = np.zeros_like(close)
+    returns[1:] = close[1:] / close[:-1] - 1
+    periods_per_year = PERIODS_PER_YEAR.get(interval, 252)
+    slow_ema = _ewm_columns(close, slow_spans)
+
+    n_jobs = max(1, min(int(n_jobs), len(fast_spans)))
+    if n_jobs == 1:
+        results = _sweep_chunk(close, fast_spans, slow_ema, returns, initial_capital, periods_per_year)
+    else:
+        chunks = np.array_split(fast_spans, n_jobs)
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            parts = list(pool.map(_sweep_chunk, [close] * n_jobs, chunks, [slow_ema] * n_jobs,
+                                  [returns] * n_jobs, [initial_capital] * n_jobs, [periods_per_year] * n_jobs))
+        results = [np.concatenate(col) for col in zip(*parts)]
+
+    fast_grid, slow_grid = np.meshgrid(fast_spans, slow_spans, indexing='ij')
+    sweep = pd.DataFrame(dict(zip(columns, [fast_grid.ravel(), slow_grid.ravel(), *results])))
+    if fast_below_slow:
+        sweep = sweep[sweep['fast_ma'] < sweep['slow_ma']]
+    return sweep.sort_values(rank_by, ascending=False, na_position='last').reset_index(drop=True)
@@ -0,0 +1,258 @@
+"""
+Headless batch runner: the app's pipeline (load -> indicators -> crossover backtest -> metrics
+-> optional model) over a whole ticker universe on a process pool, without Streamlit.
+
+    python batch_runner.py --universe universe.txt --out runs/nightly --workers 8
+
+Outputs are hive-partitioned Parquet under --out (indicators/, backtest/, metrics/ and
+predictions/, one ticker=<symbol> directory each) plus _status.jsonl, which lets a rerun
+resume after a crash by skipping tickers that already finished.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+import tomllib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from config.settings import DEFAULT_START_DAYS
+
+SOURCES = ("yahoo", "alpha_vantage", "polygon", "finnhub")
+SECRET_KEYS = {"alpha_vantage": "alpha", "polygon": "polygon", "finnhub": "finnhub"}
+MODELS = {"linear": "Linear Regression", "random_forest": "Random Forest", "lstm": "lstm", "transformer": "transformer"}
+BACKTEST_COLUMNS = ['Close', 'fast', 'slow', 'signal', 'position', 'returns', 'strategy', 'equity']
+
+
+class TickerTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise TickerTimeout()
+
+
+class _deadline:
+    """SIGALRM-based time limit for the current worker process (no-op where SIGALRM does not exist)."""
+
+    def __init__(self, seconds):
+        self.seconds = int(seconds) if seconds else 0
+
+    def __enter__(self):
+        if self.seconds and hasattr(signal, "SIGALRM"):
+            signal.signal(signal.SIGALRM, _on_alarm)
+            signal.alarm(self.seconds)
+        return self
+
+    def __exit__(self, *exc):
+        if self.seconds and hasattr(signal, "SIGALRM"):
+            signal.alarm(0)
+        return False
+
+
+def read_universe(path):
+    """Tickers from a text file: one or more per line, comma/whitespace separated, '#' starts a comment."""
+    tickers = []
+    with open(path) as fh:
+        for line in fh:
+            line = line.split("#", 1)[0]
+            tickers += [t.strip().upper() for t in line.replace(",", " ").split() if t.strip()]
+    return list(dict.fromkeys(tickers))
+
+
+def _api_key(source, explicit=""):
+    if explicit or source not in SECRET_KEYS:
+        return explicit
+    secrets = Path(".streamlit/secrets.toml")
+    if not secrets.exists():
+        return ""
+    with open(secrets, "rb") as fh:
+        return tomllib.load(fh).get("api_keys", {}).get(SECRET_KEYS[source], "")
+
+
+def _write_partition(df, root, dataset, ticker):
+    part = Path(root) / dataset / f"ticker={ticker}"
+    part.mkdir(parents=True, exist_ok=True)
+    tmp = part / "part-0.parquet.tmp"
+    df.to_parquet(tmp)
+    os.replace(tmp, part / "part-0.parquet")
+
+
+def _predict(model, data, ticker, interval):
+    from ml_models import get_backend
+    from ml_models import registry as model_registry
+    if model == "linear":
+        _, preds = get_backend("Linear Regression").train_linear_regression(data)
+    elif model == "random_forest":
+        _, preds = get_backend("Random Forest").train_random_forest(data, n_jobs=1)
+    else:
+        _, preds, _ = model_registry.get_or_train(model, data, ticker, interval)
+    return pd.DataFrame({"Actual": data["Close"].iloc[-len(preds):].to_numpy(), "Predicted": preds},
+                        index=data.index[-len(preds):])
+
+
+def process_ticker(ticker, df, cfg):
+    from backtest.strategies import run_crossover, compute_metrics
+    from indicators.technicals import compute_indicators
+
+    data = compute_indicators(df, **cfg["indicators"])
+    bt = run_crossover(data, **cfg["backtest"])
+    metrics = compute_metrics(bt, interval=cfg["interval"])
+    metrics.update(rows=len(bt), final_equity=float(bt['equity'].iloc[-1]),
+                   start=str(bt.index[0]), end=str(bt.index[-1]))
+
+    _write_partition(data, cfg["out"], "indicators", ticker)
+    _write_partition(bt[[c for c in BACKTEST_COLUMNS if c in bt.columns]], cfg["out"], "backtest", ticker)
+    if cfg["model"]:
+        preds = _predict(cfg["model"], data, ticker, cfg["interval"])
+        _write_partition(preds, cfg["out"], "predictions", ticker)
+        err = preds["Predicted"] - preds["Actual"]
+        metrics.update(model=cfg["model"], model_mae=float(err.abs().mean()))
+    _write_partition(pd.DataFrame([metrics]), cfg["out"], "metrics", ticker)
+
+
+def run_chunk(tickers, cfg):
+    """Worker entry point: load a chunk with one batched call, then run the pipeline per ticker."""
+    from data_sources import load_many
+
+    results = []
+    t0 = time.perf_counter()
+    try:
+        with _deadline(cfg["load_timeout"]):
+            frames, errors = load_many(cfg["source"], tickers, cfg["start"], cfg["end"], cfg["interval"],
+                                       api_key=cfg["api_key"])
+    except TickerTimeout:
+        return [dict(ticker=t, status="timeout", error=f"chunk load exceeded {cfg['load_timeout']}s",
+                     seconds=time.perf_counter() - t0)
+                for t in tickers]
+    except Exception as exc:
+        return [dict(ticker=t, status="error", error=f"load failed: {exc}", seconds=time.perf_counter() - t0)
+                for t in tickers]
+
+    for ticker in tickers:
+        t0 = time.perf_counter()
+        if ticker not in frames:
+            results.append(dict(ticker=ticker, status="no_data", error=str(errors.get(ticker, "")), seconds=0.0))
+            continue
+        try:
+            with _deadline(cfg["timeout"]):
+                process_ticker(ticker, frames[ticker], cfg)
+            results.append(dict(ticker=ticker, status="ok", error="", seconds=time.perf_counter() - t0))
+        except TickerTimeout:
+            results.append(dict(ticker=ticker, status="timeout", error=f"exceeded {cfg['timeout']}s",
+                                seconds=time.perf_counter() - t0))
+        except Exception as exc:
+            results.append(dict(ticker=ticker, status="error", error=repr(exc), seconds=time.perf_counter() - t0))
+    return results
+
+
+def completed(out):
+    """Tickers whose latest recorded status is 'ok'."""
+    path = Path(out) / "_status.jsonl"
+    latest = {}
+    if path.exists():
+        with open(path) as fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # a line torn by a crash
+                latest[rec["ticker"]] = rec["status"]
+    return {t for t, status in latest.items() if status == "ok"}
+
+
+def run(tickers, cfg, workers=None, chunk_size=25, resume=True, log=print):
+    """Schedule chunks on a process pool with a bounded number in flight; returns {status: count}."""
+    out = Path(cfg["out"])
+    out.mkdir(parents=True, exist_ok=True)
+    done = completed(out) if resume else set()
+    todo = [t for t in tickers if t not in done]
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    log(f"{len(tickers)} tickers, {len(done & set(tickers))} already done, {len(chunks)} chunks on {workers} workers")
+
+    counts = {}
+    with open(out / "_status.jsonl", "a") as status_log:
+        def record(results):
+            for rec in results:
+                counts[rec["status"]] = counts.get(rec["status"], 0) + 1
+                status_log.write(json.dumps(rec) + "\n")
+            status_log.flush()
+
+        pending = list(reversed(chunks))
+        pool = ProcessPoolExecutor(max_workers=workers)
+        in_flight = {}
+        try:
+            while pending or in_flight:
+                while pending and len(in_flight) < 2 * workers:
+                    chunk = pending.pop()
+                    in_flight[pool.submit(run_chunk, chunk, cfg)] = chunk
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    chunk = in_flight.pop(future)
+                    try:
+                        record(future.result())
+                    except BrokenProcessPool:
+                        # a worker died (e.g. OOM); fail the chunks it took down and start a fresh pool
+                        for lost in [chunk] + list(in_flight.values()):
+                            record([dict(ticker=t, status="error", error="worker crashed", seconds=0.0) for t in lost])
+                        in_flight.clear()
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        pool = ProcessPoolExecutor(max_workers=workers)
+                        break
+                    except Exception as exc:
+                        record([dict(ticker=t, status="error", error=repr(exc), seconds=0.0) for t in chunk])
+                log(f"  {sum(counts.values())}/{len(todo)} processed: {counts}")
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    metrics_dir = out / "metrics"
+    if metrics_dir.exists():
+        pd.read_parquet(metrics_dir).to_parquet(out / "metrics_summary.parquet")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Market Trend Analyzer pipeline over a ticker universe.")
+    parser.add_argument("--universe", required=True, help="text file with tickers")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--source", choices=SOURCES, default="yahoo")
+    parser.add_argument("--api-key", default="", help="defaults to .streamlit/secrets.toml")
+    parser.add_argument("--start", default=str(date.today() - timedelta(days=DEFAULT_START_DAYS)))
+    parser.add_argument("--end", default=str(date.today()))
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--model", choices=sorted(MODELS), default=None)
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument("--chunk-size", type=int, default=25)
+    parser.add_argument("--timeout", type=int, default=300, help="seconds per ticker")
+    parser.add_argument("--load-timeout", type=int, default=300, help="seconds for each chunk's batched load")
+    parser.add_argument("--no-resume", action="store_true", help="recompute tickers that already finished")
+    parser.add_argument("--sma", type=int, default=20)
+    parser.add_argument("--ema", type=int, default=50)
+    parser.add_argument("--rsi", type=int, default=14)
+    parser.add_argument("--fast-ma", type=int, default=10)
+    parser.add_argument("--slow-ma", type=int, default=30)
+    parser.add_argument("--initial-capital", type=float, default=10000)
+    args = parser.parse_args(argv)
+
+    cfg = {
+        "out": str(args.out), "source": args.source, "api_key": _api_key(args.source, args.api_key),
+        "start": date.fromisoformat(args.start), "end": date.fromisoformat(args.end),
+        "interval": args.interval, "model": args.model, "timeout": args.timeout,
+        "load_timeout": args.load_timeout,
+        "indicators": dict(sma=args.sma, ema=args.ema, rsi=args.rsi),
+        "backtest": dict(fast_ma=args.fast_ma, slow_ma=args.slow_ma, initial_capital=args.initial_capital),
+    }
+    counts = run(read_universe(args.universe), cfg, workers=args.workers, chunk_size=args.chunk_size,
+                 resume=not args.no_resume)
+    return 0 if set(counts) <= {"ok", "no_data"} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
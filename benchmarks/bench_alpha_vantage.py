@@ -0,0 +1,70 @@
+"""
+Alpha Vantage loading against the local quota-enforcing stub, no API key or network needed.
+
+    python benchmarks/bench_alpha_vantage.py --tickers 12 --quota 5 --window 2
+
+Loads a watchlist (with duplicates, as several app sessions would) through data_sources.load_many
+into a throwaway store, then loads it again the next "day" to show the compact refresh. Reports
+wall time, provider calls, throttled responses and coalesced requests; every ticker must arrive.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.mock_servers import serve_alpha_vantage
+from data_sources import alpha_vantage, load_many
+from data_sources.scheduler import Scheduler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=12)
+    parser.add_argument("--quota", type=int, default=5, help="stub calls allowed per window")
+    parser.add_argument("--window", type=float, default=2.0, help="stub quota window in seconds")
+    parser.add_argument("--client-rate", type=int, default=None,
+                        help="client token bucket size per window (default: the quota; more provokes throttling)")
+    parser.add_argument("--mode", choices=["note", "429"], default="note")
+    args = parser.parse_args(argv)
+
+    server, url = serve_alpha_vantage(quota=args.quota, window=args.window, mode=args.mode)
+    alpha_vantage.BASE_URL = url
+    alpha_vantage.SCHEDULER = Scheduler(args.client_rate or args.quota, per=args.window, backoff=args.window / 4,
+                                        max_backoff=args.window)
+    tickers = [f"SYN{i:03d}" for i in range(args.tickers)]
+    end = date.today()
+    start = end - timedelta(days=365 * 3)
+
+    os.chdir(tempfile.mkdtemp(prefix="bench_av_"))
+    try:
+        t0 = time.perf_counter()
+        # three overlapping "sessions" asking for the same watchlist at once
+        with ThreadPoolExecutor(3) as pool:
+            runs = list(pool.map(lambda _: load_many("alpha_vantage", tickers, start, end, "1d", api_key="demo"),
+                                 range(3)))
+        cold = time.perf_counter() - t0
+        missing = sorted({t for frames, _ in runs for t in tickers if t not in frames})
+        print(f"cold load: {cold:6.2f}s  {len(tickers)} tickers x 3 sessions  missing={missing or 'none'}")
+        print(f"  scheduler {alpha_vantage.SCHEDULER.stats}")
+        print(f"  stub      {server.stats}")
+
+        before = dict(server.stats)
+        t0 = time.perf_counter()
+        frames, errors = load_many("alpha_vantage", tickers, start, end, "1d", api_key="demo")
+        warm = time.perf_counter() - t0
+        served = {k: v - before.get(k, 0) for k, v in server.stats.items() if v != before.get(k, 0)}
+        print(f"refresh:   {warm:6.2f}s  {len(frames)}/{len(tickers)} tickers, stub served {served}")
+        return 0 if not missing and not errors else 1
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
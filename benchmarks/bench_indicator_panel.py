@@ -0,0 +1,65 @@
+"""
+compute_indicators in a per-ticker loop vs compute_indicators_panel on one wide frame.
+
+    python benchmarks/bench_indicator_panel.py --bars 2520 --tickers 2000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+from benchmarks.synthetic import random_walk_close
+from indicators.technicals import compute_indicators, compute_indicators_panel, PANEL_FIELDS
+
+
+def _mismatches(looped, panel, aligned=False):
+    mismatched = []
+    for t, df in looped.items():
+        for field in PANEL_FIELDS:
+            column = panel[(field, t)]
+            if aligned:
+                column = column.loc[df.index]
+            if not np.array_equal(df[field].to_numpy(), column.to_numpy(), equal_nan=True):
+                mismatched.append((field, t))
+    return mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bars", type=int, default=2520)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    close = random_walk_close(args.bars, args.tickers, seed=args.seed)
+
+    t0 = time.perf_counter()
+    looped = {t: compute_indicators(close[[t]].rename(columns={t: "Close"})) for t in close.columns}
+    loop_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    panel = compute_indicators_panel(close)
+    panel_s = time.perf_counter() - t0
+
+    mismatched = _mismatches(looped, panel)
+    print(f"{args.tickers} tickers x {args.bars} bars")
+    print(f"  loop : {loop_s:8.3f}s")
+    print(f"  panel: {panel_s:8.3f}s  ({loop_s / panel_s:.1f}x faster)")
+    print(f"  identical results: {not mismatched}" + (f" (first mismatch {mismatched[0]})" if mismatched else ""))
+
+    # unequal lengths: later listings leave leading NaN in the panel that must not enter the windows
+    ragged = {t: close[t].iloc[i * len(close) // (2 * len(close.columns)):].to_frame("Close")
+              for i, t in enumerate(close.columns)}
+    looped = {t: compute_indicators(df) for t, df in ragged.items()}
+    ragged_mismatched = _mismatches(looped, compute_indicators_panel(ragged), aligned=True)
+    print(f"  identical results, unequal lengths: {not ragged_mismatched}"
+          + (f" (first mismatch {ragged_mismatched[0]})" if ragged_mismatched else ""))
+    return 1 if mismatched or ragged_mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
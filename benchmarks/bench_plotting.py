@@ -0,0 +1,59 @@
+"""
+Chart payload and build time with and without level-of-detail rendering.
+
+    python benchmarks/bench_plotting.py --bars 60000
+
+"full" sends every bar (width_px=None, the old behaviour); "lod" downsamples to the
+configured chart width; "cached" is a rerun served by cached_figure.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.synthetic import random_walk_ohlcv
+from backtest.strategies import run_crossover
+from indicators.technicals import compute_indicators
+from utils.plotting import plot_price, plot_rsi, plot_macd, plot_equity, cached_figure
+
+
+def measure(build):
+    t0 = time.perf_counter()
+    fig = build()
+    built = time.perf_counter() - t0
+    payload = len(fig.to_json())
+    return built, time.perf_counter() - t0, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bars", type=int, default=60_000, help="hourly bars (10y of hourly US bars ~ 17.5k)")
+    args = parser.parse_args()
+
+    data = compute_indicators(random_walk_ohlcv(args.bars, freq="h"))
+    bt = run_crossover(data)
+    charts = {
+        "price": (plot_price, data, (20, 50)),
+        "rsi": (plot_rsi, data, (14,)),
+        "macd": (plot_macd, data, ()),
+        "equity": (plot_equity, bt, ()),
+    }
+
+    print(f"{args.bars} bars")
+    print(f"{'chart':8} {'mode':7} {'build s':>8} {'build+json s':>13} {'payload KB':>11}")
+    for name, (fn, frame, extra) in charts.items():
+        for mode, build in (
+            ("full", lambda: fn(frame, *extra, width_px=None)),
+            ("lod", lambda: fn(frame, *extra)),
+            ("cached", lambda: cached_figure(fn, frame, *extra)),
+        ):
+            if mode == "cached":
+                cached_figure(fn, frame, *extra)  # warm the cache
+            built, total, payload = measure(build)
+            print(f"{name:8} {mode:7} {built:8.3f} {total:13.3f} {payload / 1024:11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Polygon / Finnhub bulk loading throughput against the local stubs, no API key or network needed.
+
+    python benchmarks/bench_providers.py --tickers 8 --days 90 --interval 1m
+    python benchmarks/bench_providers.py --record /tmp/polygon-rec     # save the stub's responses
+    python benchmarks/bench_providers.py --replay /tmp/polygon-rec     # serve them back, Polygon only
+
+Loads a watchlist through data_sources.load_many into a throwaway store and reports bars/s, pages and
+throttling per provider, then times parsing one response body with json.loads + DataFrame against
+the columnar parsers in data_sources.bulk.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.mock_servers import serve_finnhub, serve_polygon, serve_replay
+from data_sources import bulk, finnhub, load_many, polygon
+from data_sources.scheduler import Scheduler
+
+
+def _timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _parse_polygon(body):
+    rows = json.loads(body)["results"]
+    return pd.DataFrame(rows)[["t", "o", "h", "l", "c", "v"]]
+
+
+def _parse_finnhub(body):
+    payload = json.loads(body)
+    return pd.DataFrame({k: payload[k] for k in ("t", "o", "h", "l", "c", "v")})
+
+
+def _load(name, module, server, url, args, tickers, start, end):
+    module.BASE_URL = url
+    module.SCHEDULER = Scheduler(args.client_rate, per=1.0, backoff=0.1, max_backoff=1.0, max_retries=10)
+    t0 = time.perf_counter()
+    frames, errors = load_many(name, tickers, start, end, args.interval, api_key="demo")
+    seconds = time.perf_counter() - t0
+    bars = sum(len(df) for df in frames.values())
+    print(f"{name:8s} {seconds:6.2f}s  {bars:>9,d} bars  {bars / seconds:>11,.0f} bars/s  "
+          f"{len(frames)}/{len(tickers)} tickers  errors={sorted(errors) or 'none'}")
+    print(f"  stub      {server.stats}")
+    print(f"  scheduler {module.SCHEDULER.stats}")
+    return not errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=8)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--page-limit", type=int, default=50000, help="Polygon stub bars per page")
+    parser.add_argument("--quota", type=int, default=None, help="stub calls allowed per key per second")
+    parser.add_argument("--client-rate", type=int, default=1000, help="client calls per second")
+    parser.add_argument("--latency", type=float, default=0.02, help="stub seconds per response")
+    parser.add_argument("--record", help="directory to save the Polygon stub's responses in")
+    parser.add_argument("--replay", help="directory of recorded Polygon responses to serve instead of the stub")
+    args = parser.parse_args(argv)
+
+    tickers = [f"SYN{i:03d}" for i in range(args.tickers)]
+    end = date.today() - timedelta(days=1)
+    start = end - timedelta(days=args.days)
+
+    if args.replay:
+        servers = {"polygon": (polygon, *serve_replay(args.replay, latency=args.latency))}
+    else:
+        servers = {"polygon": (polygon, *serve_polygon(quota=args.quota, window=1.0, page_limit=args.page_limit,
+                                                       latency=args.latency, record=args.record)),
+                   "finnhub": (finnhub, *serve_finnhub(quota=args.quota, window=1.0, latency=args.latency))}
+
+    os.chdir(tempfile.mkdtemp(prefix="bench_providers_"))
+    ok = True
+    try:
+        for name, (module, server, url) in servers.items():
+            ok &= _load(name, module, server, url, args, tickers, start, end)
+
+        session = bulk.session()
+        if "finnhub" in servers:
+            url = servers["finnhub"][2]
+            body = session.get(f"{url}/stock/candle", params={
+                "symbol": "SYN000", "resolution": "1", "token": "demo",
+                "from": int(pd.Timestamp(start, tz="UTC").timestamp()),
+                "to": int(pd.Timestamp(start + timedelta(days=30), tz="UTC").timestamp())}).content
+            fields = {k: k for k in ("t", "o", "h", "l", "c", "v")}
+            print(f"parse finnhub {len(body) / 1e6:.1f} MB: json {_timed(lambda: _parse_finnhub(body)) * 1e3:7.1f} ms"
+                  f"   columnar {_timed(lambda: bulk.parse_arrays(body, fields)) * 1e3:7.1f} ms")
+        if not args.replay:
+            url = servers["polygon"][2]
+            body = session.get(f"{url}/v2/aggs/ticker/SYN000/range/1/minute/{start}/{start + timedelta(days=60)}",
+                               params={"limit": 50000, "apiKey": "demo"}).content
+            fields = {k: k for k in ("t", "o", "h", "l", "c", "v")}
+            print(f"parse polygon {len(body) / 1e6:.1f} MB: json {_timed(lambda: _parse_polygon(body)) * 1e3:7.1f} ms"
+                  f"   columnar {_timed(lambda: bulk.scan_rows([body], fields)) * 1e3:7.1f} ms")
+        return 0 if ok else 1
+    finally:
+        for _, server, _ in servers.values():
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Cold-start cost of the app's imports, measured in fresh interpreters.
+
+    python benchmarks/bench_startup.py --repeat 5
+
+Each scenario runs in its own subprocess and reports the median wall time, the
+peak RSS and which heavy frameworks ended up in sys.modules.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# what app.py imports at module level, before any model is chosen
+APP_IMPORTS = """
+import streamlit, pandas
+import config.settings, indicators.technicals, backtest.strategies, utils.plotting
+import data_sources
+import ml_models, ml_models.registry
+"""
+
+SCENARIOS = {
+    "app, no AI model": APP_IMPORTS,
+    "app + Linear Regression": APP_IMPORTS + "ml_models.get_backend('Linear Regression')\n",
+    "app + LSTM": APP_IMPORTS + "ml_models.get_backend('LSTM')\n",
+    "app + Transformer": APP_IMPORTS + "ml_models.get_backend('Transformer')\n",
+    "eager (all backends at import)": APP_IMPORTS + "".join(
+        f"ml_models.get_backend({name!r})\n" for name in ("LSTM", "Transformer", "Linear Regression")),
+}
+
+PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - t0
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+rss_mb = rss / 1024 ** 2 if sys.platform == "darwin" else rss / 1024
+print(json.dumps({{"seconds": elapsed, "rss_mb": rss_mb,
+                  "frameworks": [m for m in ("tensorflow", "torch", "sklearn") if m in sys.modules]}}))
+"""
+
+
+def run(body):
+    code = PROBE.format(body="\n".join(body.strip().splitlines()))
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None, proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+    return json.loads(proc.stdout.strip().splitlines()[-1]), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'scenario':34} {'median s':>9} {'peak RSS MB':>12}  frameworks")
+    for name, body in SCENARIOS.items():
+        samples, error = [], None
+        for _ in range(args.repeat):
+            sample, error = run(body)
+            if sample is None:
+                break
+            samples.append(sample)
+        if not samples:
+            print(f"{name:34} {'-':>9} {'-':>12}  unavailable: {error}")
+            continue
+        results[name] = {
+            "seconds": statistics.median(s["seconds"] for s in samples),
+            "rss_mb": statistics.median(s["rss_mb"] for s in samples),
+            "frameworks": samples[-1]["frameworks"],
+        }
+        r = results[name]
+        print(f"{name:34} {r['seconds']:9.2f} {r['rss_mb']:12.0f}  {', '.join(r['frameworks']) or 'none'}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Local stand-ins for the market data HTTP APIs, so loaders can be exercised and timed offline.
+
+    server, url = serve_alpha_vantage(quota=5, window=2.0)
+    ...
+    server.shutdown()
+
+Each server runs on a daemon thread, answers from deterministic synthetic bars and counts what it
+served in `server.stats`. Servers started with record=<dir> save every response they send, and
+serve_replay(<dir>) answers later runs from those files alone.
+"""
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import deque
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import random_walk_ohlcv
+
+AV_NOTE = ("Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute "
+           "and 100 calls per day.")
+
+
+def _seed(symbol):
+    return sum(ord(c) * 31 ** i for i, c in enumerate(symbol)) % 2 ** 32
+
+
+def synthetic_daily(symbol, bars=2500, end=None):
+    """Deterministic business-day OHLCV bars for a symbol, ending at `end` (default today)."""
+    df = random_walk_ohlcv(bars, seed=_seed(symbol))
+    df.index = pd.bdate_range(end=end or date.today(), periods=bars, name="Date")
+    return df
+
+
+def synthetic_bars(symbol, start, end, minutes=None, freq="B", tz="America/New_York"):
+    """
+    Deterministic bars for the dates [start, end] as (epoch seconds, open, high, low, close, volume)
+    arrays: regular-session bars every `minutes` minutes, else one bar per `freq` period at midnight
+    in `tz`. Prices depend only on the timestamp, so any split of a range into requests agrees.
+    """
+    if minutes:
+        days = pd.bdate_range(start, end).tz_localize(tz).as_unit("s").asi8
+        ts = (days[:, None] + np.arange(9 * 60 + 30, 16 * 60, minutes)[None, :] * 60).ravel()
+    else:
+        ts = pd.date_range(start, end, freq=freq).tz_localize(tz).as_unit("s").asi8
+    seed = _seed(symbol) % 1000
+
+    def price(t):
+        return (50 + seed / 10) * np.exp(0.2 * np.sin(t / 4e6 + seed) + 0.01 * np.sin(t / 3e3 + seed))
+
+    close = price(ts.astype(np.float64))
+    open_ = price(ts - 60.0 * (minutes or 1440))
+    high = np.maximum(open_, close) * 1.001
+    low = np.minimum(open_, close) * 0.999
+    volume = 1000 + (ts // 60 * (seed + 7)) % 50_000
+    return ts, open_, high, low, close, volume
+
+
+def save_recording(directory, path, status, body, base):
+    """Store one response for serve_replay; `base` (the server's URL) is templated out of the body."""
+    key = _replay_key(path)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / f"{hashlib.sha1(key.encode()).hexdigest()}.json", "w") as fh:
+        json.dump({"path": key, "status": status, "body": body.decode().replace(base, "{BASE}")}, fh)
+
+
+def _replay_key(path):
+    # API keys are not part of what was asked for, and are not written to disk
+    parsed = urlparse(path)
+    query = sorted((k, v) for k, v in parse_qsl(parsed.query) if k not in ("apiKey", "apikey", "token"))
+    return f"{parsed.path}?{urlencode(query)}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload, headers=None):
+        self._send_body(status, json.dumps(payload).encode(), headers)
+
+    def _send_body(self, status, body, headers=None):
+        if self.server.record:
+            save_recording(self.server.record, self.path, status, body, self.server.url)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count(self, key, n=1):
+        with self.server.lock:
+            self.server.stats[key] = self.server.stats.get(key, 0) + n
+
+    def _begin(self):
+        """Count and delay the request; returns its path and query."""
+        parsed = urlparse(self.path)
+        self._count("requests")
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        return parsed.path, {k: v[0] for k, v in parse_qs(parsed.query).items()}
+
+    def _throttled(self, apikey):
+        """Sliding-window quota of server.quota calls per server.window seconds per key (None: unlimited)."""
+        server = self.server
+        if server.quota is None:
+            return False
+        now = time.monotonic()
+        with server.lock:
+            calls = server.calls.setdefault(apikey, deque())
+            while calls and now - calls[0] >= server.window:
+                calls.popleft()
+            if len(calls) >= server.quota:
+                server.stats["throttled"] = server.stats.get("throttled", 0) + 1
+                return True
+            calls.append(now)
+            return False
+
+
+class _AlphaVantageHandler(_Handler):
+    SERIES_KEYS = {"TIME_SERIES_DAILY_ADJUSTED": ("Time Series (Daily)", None),
+                   "TIME_SERIES_WEEKLY_ADJUSTED": ("Weekly Adjusted Time Series", "W-FRI"),
+                   "TIME_SERIES_MONTHLY_ADJUSTED": ("Monthly Adjusted Time Series", "ME")}
+
+    def do_GET(self):
+        _, query = self._begin()
+        if self._throttled(query.get("apikey", "")):
+            if self.server.mode == "429":
+                return self._send(429, {"Note": AV_NOTE}, {"Retry-After": str(int(self.server.window))})
+            return self._send(200, {"Note": AV_NOTE})
+        function, symbol = query.get("function"), query.get("symbol", "")
+        if function not in self.SERIES_KEYS or not symbol:
+            return self._send(200, {"Error Message": "Invalid API call. Please retry or visit the documentation."})
+
+        self._count(f"outputsize={query.get('outputsize', 'compact')}")
+        df = synthetic_daily(symbol, self.server.bars)
+        key, rule = self.SERIES_KEYS[function]
+        if rule:
+            df = df.resample(rule).agg({"Open": "first", "High": "max", "Low": "min", "Close": "last",
+                                        "Volume": "sum"}).dropna()
+        elif query.get("outputsize", "compact") == "compact":
+            df = df.iloc[-100:]
+        series = {str(ts.date()): {"1. open": f"{r.Open:.4f}", "2. high": f"{r.High:.4f}", "3. low": f"{r.Low:.4f}",
+                                   "4. close": f"{r.Close:.4f}", "5. adjusted close": f"{r.Close:.4f}",
+                                   "6. volume": str(int(r.Volume))}
+                  for ts, r in zip(df.index[::-1], df.iloc[::-1].itertuples())}
+        self._send(200, {"Meta Data": {"2. Symbol": symbol}, key: series})
+
+
+class _PolygonHandler(_Handler):
+    """GET /v2/aggs/ticker/{ticker}/range/{multiplier}/{timespan}/{from}/{to}, paged through next_url."""
+    FREQS = {"day": "B", "week": "W-SUN", "month": "MS"}
+
+    def do_GET(self):
+        path, query = self._begin()
+        if self._throttled(query.get("apiKey", "")):
+            return self._send(429, {"status": "ERROR", "request_id": "stub",
+                                    "error": "You've exceeded the maximum requests per minute."})
+        parts = path.strip("/").split("/")
+        if len(parts) != 9 or parts[:3] != ["v2", "aggs", "ticker"] or parts[6] not in ("minute", "hour", *self.FREQS):
+            return self._send(404, {"status": "NOT_FOUND", "request_id": "stub", "message": "Not Found"})
+        ticker, multiplier, timespan, start, end = parts[3], int(parts[5]), parts[6], parts[7], parts[8]
+        # continuation pages start from the next bar's millisecond timestamp, as the real next_url does
+        after = int(start) if start.isdigit() else None
+        first = pd.Timestamp(after, unit="ms", tz="UTC").tz_convert("America/New_York").date() if after else start
+        minutes = multiplier * (60 if timespan == "hour" else 1) if timespan in ("minute", "hour") else None
+        bars = synthetic_bars(ticker, first, end, minutes, self.FREQS.get(timespan, "B"))
+        if after:
+            bars = [a[bars[0] * 1000 >= after] for a in bars]
+        limit = min(int(query.get("limit", 5000)), self.server.page_limit)
+        ts, o, h, l, c, v = (a[:limit] for a in bars)
+        self._count("pages")
+        self._count("bars", len(ts))
+        rows = ",".join(f'{{"v":{v_},"vw":{(h_ + l_ + c_) / 3:.4f},"o":{o_:.4f},"c":{c_:.4f},"h":{h_:.4f},'
+                        f'"l":{l_:.4f},"t":{t_ * 1000},"n":{v_ // 100}}}' for t_, o_, h_, l_, c_, v_ in zip(ts, o, h, l, c, v))
+        body = (f'{{"ticker":"{ticker}","queryCount":{len(ts)},"resultsCount":{len(ts)},"adjusted":true,'
+                f'"results":[{rows}],"status":"OK","request_id":"stub","count":{len(ts)}')
+        if len(bars[0]) > limit:
+            following = bars[0][limit] * 1000
+            rest = urlencode({"adjusted": "true", "sort": "asc", "limit": query.get("limit", 5000),
+                              "cursor": following})
+            body += (f',"next_url":"{self.server.url}/v2/aggs/ticker/{ticker}/range/{multiplier}/{timespan}/'
+                     f'{following}/{end}?{rest}"')
+        self._send_body(200, (body + "}").encode())
+
+
+class _FinnhubHandler(_Handler):
+    """GET /api/v1/stock/candle?symbol&resolution&from&to: parallel arrays, or {"s": "no_data"}."""
+    FREQS = {"D": "B", "W": "W-MON", "M": "MS"}
+
+    def do_GET(self):
+        path, query = self._begin()
+        if self._throttled(query.get("token", "")):
+            return self._send(429, {"error": "API limit reached. Please try again later."})
+        resolution = query.get("resolution", "")
+        if path != "/api/v1/stock/candle" or not (resolution.isdigit() or resolution in self.FREQS):
+            return self._send(200, {"error": "Wrong resolution or endpoint."})
+        frm, to = int(query["from"]), int(query["to"])
+        if resolution.isdigit():
+            days = [pd.Timestamp(x, unit="s", tz="UTC").tz_convert("America/New_York").date() for x in (frm, to)]
+            ts, o, h, l, c, v = synthetic_bars(query["symbol"], *days, minutes=int(resolution))
+        else:
+            days = [pd.Timestamp(x, unit="s").date() for x in (frm, to)]
+            ts, o, h, l, c, v = synthetic_bars(query["symbol"], *days, freq=self.FREQS[resolution], tz="UTC")
+        keep = (ts >= frm) & (ts <= to)
+        self._count("pages")
+        self._count("bars", int(keep.sum()))
+        if not keep.any():
+            return self._send(200, {"s": "no_data"})
+        self._send(200, {"c": np.round(c[keep], 4).tolist(), "h": np.round(h[keep], 4).tolist(),
+                         "l": np.round(l[keep], 4).tolist(), "o": np.round(o[keep], 4).tolist(), "s": "ok",
+                         "t": ts[keep].tolist(), "v": v[keep].tolist()})
+
+
+class _ReplayHandler(_Handler):
+    def do_GET(self):
+        self._begin()
+        name = hashlib.sha1(_replay_key(self.path).encode()).hexdigest()
+        try:
+            with open(Path(self.server.directory) / f"{name}.json") as fh:
+                recorded = json.load(fh)
+        except FileNotFoundError:
+            self._count("missing")
+            return self._send(404, {"error": f"not recorded: {_replay_key(self.path)}"})
+        self._send_body(recorded["status"], recorded["body"].replace("{BASE}", self.server.url).encode())
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients closing pooled keep-alive connections is routine, not an error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _serve(handler, port, record=None, **attrs):
+    server = _Server(("127.0.0.1", port), handler)
+    server.lock = threading.Lock()
+    server.stats = {}
+    server.record = record
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    for name, value in attrs.items():
+        setattr(server, name, value)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.url
+
+
+def serve_alpha_vantage(quota=5, window=60.0, bars=2500, mode="note", latency=0.0, port=0, record=None):
+    """
+    Alpha Vantage /query stub allowing `quota` calls per API key in any `window` seconds. Over quota it
+    answers like the real free tier (HTTP 200 with a "Note"), or with HTTP 429 + Retry-After if mode="429".
+    Returns (server, url).
+    """
+    server, url = _serve(_AlphaVantageHandler, port, record, quota=quota, window=window, bars=bars, mode=mode,
+                         latency=latency, calls={})
+    return server, url + "/query"
+
+
+def serve_polygon(quota=None, window=60.0, page_limit=50000, latency=0.0, port=0, record=None):
+    """
+    Polygon.io aggregates stub: at most `page_limit` bars per response (the rest through next_url)
+    and, if `quota` is set, HTTP 429 beyond `quota` calls per key in any `window` seconds.
+    Returns (server, base url) for data_sources.polygon.BASE_URL.
+    """
+    return _serve(_PolygonHandler, port, record, quota=quota, window=window, page_limit=page_limit,
+                  latency=latency, calls={})
+
+
+def serve_finnhub(quota=None, window=60.0, latency=0.0, port=0, record=None):
+    """Finnhub stock/candle stub with an optional per-key quota; returns (server, url for finnhub.BASE_URL)."""
+    server, url = _serve(_FinnhubHandler, port, record, quota=quota, window=window, latency=latency, calls={})
+    return server, url + "/api/v1"
+
+
+def serve_replay(directory, latency=0.0, port=0):
+    """Answer requests from responses recorded with record=<directory>; unknown requests get a 404."""
+    return _serve(_ReplayHandler, port, directory=directory, latency=latency)
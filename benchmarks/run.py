@@ -0,0 +1,216 @@
+"""
+Benchmark suite for the analysis pipeline on deterministic synthetic data.
+
+    python -m benchmarks.run --preset quick --out bench-new.json
+    python -m benchmarks.run --compare bench-base.json bench-new.json --threshold 0.15
+
+Each case records the best wall time over --repeat runs, the peak traced allocation
+(tracemalloc, measured in a separate run) and throughput in bars/sec. --compare exits
+non-zero when any case is slower than the baseline by more than the threshold.
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import random_walk_close, random_walk_ohlcv, random_walk_universe
+
+
+def _indicators(bars, tickers):
+    from indicators.technicals import compute_indicators
+    df = random_walk_ohlcv(bars)
+    return lambda: compute_indicators(df)
+
+
+def _indicator_panel(bars, tickers):
+    from indicators.technicals import compute_indicators_panel
+    close = random_walk_close(bars, tickers)
+    return lambda: compute_indicators_panel(close)
+
+
+def _crossover(bars, tickers):
+    from backtest.strategies import run_crossover
+    df = random_walk_ohlcv(bars)
+    return lambda: run_crossover(df)
+
+
+def _metrics(bars, tickers):
+    from backtest.strategies import run_crossover, compute_metrics
+    bt = run_crossover(random_walk_ohlcv(bars))
+    return lambda: compute_metrics(bt)
+
+
+def _sweep(bars, tickers):
+    from backtest.strategies import run_crossover_sweep
+    df = random_walk_ohlcv(bars)
+    return lambda: run_crossover_sweep(df, fast_range=range(5, 55, 5), slow_range=range(20, 220, 20))
+
+
+def _linear(bars, tickers):
+    from ml_models import get_backend
+    train = get_backend("Linear Regression").train_linear_regression
+    df = random_walk_ohlcv(bars)
+    return lambda: train(df)
+
+
+def _forest(bars, tickers):
+    from ml_models import get_backend
+    train = get_backend("Random Forest").train_random_forest
+    df = random_walk_ohlcv(bars)
+    return lambda: train(df)
+
+
+def _lstm(bars, tickers):
+    from ml_models import get_backend
+    train = get_backend("LSTM").train_lstm
+    df = random_walk_ohlcv(bars)
+    return lambda: train(df, epochs=1)
+
+
+def _transformer(bars, tickers):
+    from ml_models import get_backend
+    train = get_backend("Transformer").train_transformer
+    df = random_walk_ohlcv(bars)
+    return lambda: train(df, epochs=1)
+
+
+def _global(bars, tickers):
+    from ml_models.global_model import train_global
+    frames = random_walk_universe(bars, tickers)
+    return lambda: train_global(frames, arch="transformer", epochs=1, num_workers=0)
+
+
+def _portfolio(bars, tickers):
+    from backtest.portfolio import run_portfolio
+    close = random_walk_close(bars, tickers)
+    return lambda: run_portfolio(close, sizing='vol_target', rebalance='1mo')
+
+
+# case -> (setup(bars, tickers) returning a zero-argument callable, {preset: [(bars, tickers), ...]})
+CASES = {
+    "compute_indicators": (_indicators, {"quick": [(1_000, 1), (100_000, 1)],
+                                         "full": [(1_000, 1), (100_000, 1), (1_000_000, 1), (10_000_000, 1)]}),
+    "compute_indicators_panel": (_indicator_panel, {"quick": [(2_520, 50)],
+                                                    "full": [(2_520, 1), (2_520, 100), (2_520, 2_000)]}),
+    "run_crossover": (_crossover, {"quick": [(1_000, 1), (100_000, 1)],
+                                   "full": [(1_000, 1), (100_000, 1), (1_000_000, 1), (10_000_000, 1)]}),
+    "compute_metrics": (_metrics, {"quick": [(1_000, 1), (100_000, 1)],
+                                   "full": [(1_000, 1), (100_000, 1), (1_000_000, 1), (10_000_000, 1)]}),
+    "run_portfolio": (_portfolio, {"quick": [(5_040, 50)], "full": [(5_040, 50), (5_040, 500)]}),
+    "run_crossover_sweep": (_sweep, {"quick": [(2_520, 1)], "full": [(2_520, 1), (25_000, 1)]}),
+    "train_linear_regression": (_linear, {"quick": [(1_000, 1), (100_000, 1)],
+                                          "full": [(1_000, 1), (100_000, 1), (1_000_000, 1)]}),
+    "train_random_forest": (_forest, {"quick": [(1_000, 1)], "full": [(1_000, 1), (10_000, 1), (100_000, 1)]}),
+    "train_lstm": (_lstm, {"quick": [(1_000, 1)], "full": [(1_000, 1), (10_000, 1)]}),
+    "train_transformer": (_transformer, {"quick": [(1_000, 1)], "full": [(1_000, 1), (10_000, 1)]}),
+    "train_global": (_global, {"quick": [(1_000, 20)], "full": [(1_000, 20), (1_000, 500)]}),
+}
+
+
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_suite(preset, repeat, only=None, log=print):
+    results = []
+    for name, (setup, sizes) in CASES.items():
+        if only and name not in only:
+            continue
+        for bars, tickers in sizes[preset]:
+            label = f"{name}[{bars}x{tickers}]"
+            try:
+                fn = setup(bars, tickers)
+                seconds, peak = measure(fn, repeat)
+            except ImportError as exc:
+                log(f"{label:45} skipped ({exc})")
+                continue
+            rec = dict(case=name, bars=bars, tickers=tickers, seconds=seconds, peak_mb=peak / 1024 ** 2,
+                       bars_per_sec=bars * tickers / seconds if seconds > 0 else None)
+            results.append(rec)
+            log(f"{label:45} {seconds:9.4f}s {rec['peak_mb']:9.1f} MB {rec['bars_per_sec']:14,.0f} bars/s")
+    return {
+        "meta": dict(commit=_commit(), preset=preset, repeat=repeat, python=platform.python_version(),
+                     numpy=np.__version__, pandas=pd.__version__, machine=platform.machine(),
+                     created=datetime.now(timezone.utc).isoformat()),
+        "results": results,
+    }
+
+
+def compare(base, new, threshold, log=print):
+    """Print per-case ratios; returns the keys of cases slower than base by more than threshold."""
+    key = lambda r: (r["case"], r["bars"], r["tickers"])
+    base_by = {key(r): r for r in base["results"]}
+    regressions = []
+    log(f"{'case':45} {'base s':>9} {'new s':>9} {'ratio':>7}")
+    for rec in new["results"]:
+        old = base_by.get(key(rec))
+        if old is None or not old["seconds"]:
+            continue
+        ratio = rec["seconds"] / old["seconds"]
+        flag = "  SLOWER" if ratio > 1 + threshold else ""
+        if flag:
+            regressions.append(key(rec))
+        label = f"{rec['case']}[{rec['bars']}x{rec['tickers']}]"
+        log(f"{label:45} {old['seconds']:9.4f} {rec['seconds']:9.4f} {ratio:7.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preset", choices=["quick", "full"], default="quick")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="run only these cases")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown ratio for --compare")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as fh:
+            base = json.load(fh)
+        with open(args.compare[1]) as fh:
+            new = json.load(fh)
+        regressions = compare(base, new, args.threshold)
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1 if regressions else 0
+
+    report = run_suite(args.preset, args.repeat, only=args.case)
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""Deterministic synthetic market data for benchmarks; no network access needed."""
+import numpy as np
+import pandas as pd
+
+# business days run past pandas' Timestamp range beyond ~60k bars, so long series switch to minutes
+_DAILY_LIMIT = 50_000
+
+
+def _index(n_bars, start, freq):
+    freq = freq or ("B" if n_bars <= _DAILY_LIMIT else "min")
+    return pd.date_range(start, periods=n_bars, freq=freq, name="Date")
+
+
+def random_walk_close(n_bars, n_tickers=1, seed=0, start="2000-01-03", freq=None):
+    """Geometric random-walk closes, shape (n_bars, n_tickers), as a wide frame."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0.0002, 0.01, size=(n_bars, n_tickers))
+    close = 100 * np.exp(np.cumsum(steps, axis=0))
+    return pd.DataFrame(close, index=_index(n_bars, start, freq), columns=[f"SYN{i:04d}" for i in range(n_tickers)])
+
+
+def random_walk_ohlcv(n_bars, seed=0, start="2000-01-03", freq=None):
+    """Single-ticker OHLCV frame shaped like yahoo.load_data output."""
+    rng = np.random.default_rng(seed)
+    close = random_walk_close(n_bars, 1, seed=seed, start=start, freq=freq).iloc[:, 0]
+    open_ = close.shift(1).fillna(close.iloc[0]).to_numpy()
+    spread = np.abs(rng.normal(0, 0.005, n_bars)) * close.to_numpy()
+    high = np.maximum(open_, close.to_numpy()) + spread
+    low = np.minimum(open_, close.to_numpy()) - spread
+    volume = rng.integers(100_000, 5_000_000, n_bars)
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close.to_numpy(), "Volume": volume},
+                        index=close.index)
+
+
+def random_walk_universe(n_bars, n_tickers, seed=0, start="2000-01-03", freq=None):
+    """{ticker: OHLCV frame} for n_tickers independent random walks, as returned by data_sources.load_many."""
+    return {f"SYN{i:04d}": random_walk_ohlcv(n_bars, seed=seed + i, start=start, freq=freq) for i in range(n_tickers)}
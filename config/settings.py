@@ -1,3 +1,30 @@
 DEFAULT_TICKER = "AAPL"
-DEFAULT_INTERVAL = ["1d", "1wk", "1mo"]
+DEFAULT_INTERVAL = ["1d", "1wk", "1mo", "1h", "30m", "15m", "5m", "1m"]
 DEFAULT_START_DAYS = 365 * 2
+
+# On-disk OHLCV store shared by all data_sources loaders
+DATA_STORE_DIR = ".market_data"
+
+# Alpha Vantage endpoint and free-tier quota (requests, seconds) per API key
+ALPHA_VANTAGE_URL = "https://www.alphavantage.co/query"
+ALPHA_VANTAGE_RATE_LIMIT = (5, 60.0)
+
+# Polygon.io and Finnhub endpoints and free-tier quotas (requests, seconds) per API key
+POLYGON_URL = "https://api.polygon.io"
+POLYGON_RATE_LIMIT = (5, 60.0)
+FINNHUB_URL = "https://finnhub.io/api/v1"
+FINNHUB_RATE_LIMIT = (60, 60.0)
+# exchange timezone that intraday bars from the keyed providers are indexed in (as yfinance does)
+MARKET_TZ = "America/New_York"
+# local session open (minutes after midnight) that resampled intraday buckets start from, like the
+# providers' native bars (1h bars at 09:30, 10:30, ...)
+MARKET_OPEN_MINUTE = 9 * 60 + 30
+
+# Trained LSTM/Transformer models reused across reruns
+MODEL_REGISTRY_DIR = ".model_registry"
+MODEL_REGISTRY_MAX_BYTES = 512 * 1024 ** 2
+
+# Chart level of detail: lines keep ~2 points and candles ~1 bar per 2 pixels of this width
+PLOT_WIDTH_PX = 1400
+# traces with more points than this render through WebGL instead of SVG
+PLOT_WEBGL_THRESHOLD = 5000
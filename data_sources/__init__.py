@@ -1 +1,2 @@
-from . import yahoo, alpha_vantage, polygon, finnhub
+from . import store, yahoo, alpha_vantage, polygon, finnhub
+from .batch import load_many
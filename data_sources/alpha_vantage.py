@@ -1,30 +1,56 @@
+from datetime import date
+
 import pandas as pd
-from streamlit import cache_data
+from config.settings import ALPHA_VANTAGE_URL, ALPHA_VANTAGE_RATE_LIMIT
+from utils.caching import cache_data
+from . import store
+from .scheduler import RateLimitError, Scheduler
 
 try:
-    from alpha_vantage.timeseries import TimeSeries
+    import requests
+    _http = requests.Session()  # keep-alive connection pool shared by all requests
     _AVAILABLE = True
 except Exception:
     _AVAILABLE = False
 
-@cache_data
-def load_data(ticker, start, end, interval, api_key=""):
-    if not _AVAILABLE:
-        return pd.DataFrame()
-    if not api_key:
-        return pd.DataFrame()
-    ts = TimeSeries(key=api_key, output_format='pandas', indexing_type='date')
-    try:
-        if interval == "1d":
-            df, _ = ts.get_daily_adjusted(symbol=ticker, outputsize='full')
-        elif interval == "1wk":
-            df, _ = ts.get_weekly_adjusted(symbol=ticker)
-        elif interval == "1mo":
-            df, _ = ts.get_monthly_adjusted(symbol=ticker)
-        else:
-            return pd.DataFrame()
-    except Exception:
-        return pd.DataFrame()
+_INTERVALS = ("1d", "1wk", "1mo")
+_FUNCTIONS = {"1d": "TIME_SERIES_DAILY_ADJUSTED", "1wk": "TIME_SERIES_WEEKLY_ADJUSTED",
+              "1mo": "TIME_SERIES_MONTHLY_ADJUSTED"}
+# outputsize=compact returns the latest 100 daily bars; ask for it when the range starts within them
+COMPACT_DAYS = 130
+
+BASE_URL = ALPHA_VANTAGE_URL
+# one token bucket per API key; replace (e.g. with a faster Scheduler) to point at a stub server
+SCHEDULER = Scheduler(*ALPHA_VANTAGE_RATE_LIMIT)
+
+def _request(params):
+    resp = _http.get(BASE_URL, params=params, timeout=30)
+    if resp.status_code == 429:
+        retry_after = resp.headers.get("Retry-After")
+        raise RateLimitError(f"{params['symbol']}: HTTP 429",
+                             retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+    resp.raise_for_status()
+    payload = resp.json()
+    if "Error Message" in payload:
+        raise ValueError(f"{params['symbol']}: {payload['Error Message']}")
+    series = next((v for k, v in payload.items() if "Time Series" in k), None)
+    if series is None:
+        note = str(payload.get("Note") or payload.get("Information") or payload)
+        # the per-minute quota clears by itself; the daily one ("25 requests per day") and premium-only
+        # endpoints do not, so only the former is retried
+        if "per minute" in note.lower() or "call frequency" in note.lower():
+            raise RateLimitError(f"{params['symbol']}: {note}")
+        raise RuntimeError(f"{params['symbol']}: {note}")
+    return pd.DataFrame.from_dict(series, orient="index")
+
+def _fetch(ticker, start, end, interval, api_key=""):
+    if interval not in _FUNCTIONS:
+        raise ValueError(f"Unsupported interval: {interval}")
+    # Alpha Vantage has no date range parameter; the store slices and keeps everything returned.
+    compact = interval == "1d" and (date.today() - store._to_date(start)).days <= COMPACT_DAYS
+    params = {"function": _FUNCTIONS[interval], "symbol": ticker, "apikey": api_key, "datatype": "json",
+              "outputsize": "compact" if compact else "full"}
+    df = SCHEDULER.run(api_key, (params["function"], ticker, params["outputsize"]), lambda: _request(params))
 
     # rename columns to match yfinance style
     rename_map = {}
@@ -45,9 +71,30 @@ def load_data(ticker, start, end, interval, api_key=""):
     if 'Adj Close' in df.columns and 'Close' not in df.columns:
         df['Close'] = df['Adj Close']
     keep = [c for c in ['Open','High','Low','Close','Volume'] if c in df.columns]
-    df = df[keep].copy()
+    df = df[keep].apply(pd.to_numeric, errors="coerce")
     df.index = pd.to_datetime(df.index)
     df = df.sort_index()
-    df = df.loc[(df.index.date >= pd.to_datetime(start).date()) & (df.index.date <= pd.to_datetime(end).date())]
     df.dropna(inplace=True)
     return df
+
+def _unavailable_reason(interval, api_key=""):
+    if not _AVAILABLE:
+        return "requests package is not installed"
+    if not api_key:
+        return "missing Alpha Vantage API key"
+    if interval not in _INTERVALS:
+        return f"unsupported interval {interval}"
+    return None
+
+@cache_data
+def load_data(ticker, start, end, interval, api_key=""):
+    if _unavailable_reason(interval, api_key):
+        return pd.DataFrame()
+    try:
+        return store.load("alpha_vantage", ticker, start, end, interval,
+                          lambda t, s, e, i: _fetch(t, s, e, i, api_key=api_key))
+    except RateLimitError:
+        # still throttled after the scheduler's retries: raise rather than cache an empty frame
+        raise
+    except Exception:
+        return pd.DataFrame()
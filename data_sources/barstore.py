@@ -0,0 +1,275 @@
+"""
+Compact column store for OHLCV bars: one raw binary file per column (int64 UTC epoch-ns timestamps,
+float32 prices, uint64 volume) opened with np.memmap, plus meta.json holding the row count, the
+generation of the column files, the timezone and the covered date range.
+
+Bars after the stored ones are written past meta.json's row count, so the visible rows are never
+touched; replacing a stored tail or any other merge writes a new generation of files. Either way
+meta.json is switched atomically last, so a crash never leaves a half-written partition visible.
+Opening a partition maps the files without reading them, and slicing a date range pages in only those rows.
+"""
+import json
+import os
+import shutil
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from config.settings import MARKET_OPEN_MINUTE
+
+COLUMNS = {"ts": np.int64, "Open": np.float32, "High": np.float32, "Low": np.float32, "Close": np.float32,
+           "Volume": np.uint64}
+PRICE_COLUMNS = ("Open", "High", "Low", "Close")
+
+# intervals kept in this store rather than Parquet, in minutes
+MINUTES = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "90m": 90, "1h": 60}
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+_MINUTE_NS = 60 * 10 ** 9
+_DAY_NS = 1440 * _MINUTE_NS
+
+
+def handles(interval):
+    return interval in MINUTES
+
+
+def _path(part, column, gen):
+    return part / f"{column}.{gen}.bin"
+
+
+def _next_gen(part, meta):
+    """A generation number no column file in the partition uses yet."""
+    gens = [int(p.name.split(".")[-2]) for p in part.glob("*.*.bin") if p.name.split(".")[-2].isdigit()]
+    return max(gens + [(meta or {}).get("gen", -1)]) + 1
+
+
+def _read_meta(part):
+    try:
+        with open(part / "meta.json") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(part, meta):
+    tmp = part / "meta.json.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(meta, fh)
+    os.replace(tmp, part / "meta.json")
+
+
+def coverage(meta):
+    cov = (meta or {}).get("coverage")
+    return (date.fromisoformat(cov[0]), date.fromisoformat(cov[1])) if cov else None
+
+
+def open_columns(part):
+    """({column: read-only memmap}, meta) for a partition, or (None, None) if it is missing or damaged."""
+    meta = _read_meta(part)
+    if meta is None:
+        return None, None
+    rows, columns = meta["rows"], {}
+    for column, dtype in COLUMNS.items():
+        if rows == 0:
+            columns[column] = np.empty(0, dtype=dtype)
+            continue
+        path = _path(part, column, meta["gen"])
+        if not path.exists() or path.stat().st_size < rows * np.dtype(dtype).itemsize:
+            return None, None
+        columns[column] = np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+    return columns, meta
+
+
+def columns_from_frame(df):
+    """The typed column arrays and meta of an OHLCV frame, as open_columns() would return them."""
+    idx = pd.DatetimeIndex(df.index)
+    tz = str(idx.tz) if idx.tz is not None else None
+    if tz:
+        idx = idx.tz_convert("UTC").tz_localize(None)
+    columns = {"ts": idx.as_unit("ns").asi8.astype(np.int64)}
+    for column in PRICE_COLUMNS:
+        columns[column] = (df[column].to_numpy(dtype=np.float32) if column in df.columns
+                           else np.full(len(df), np.nan, dtype=np.float32))
+    volume = df["Volume"].to_numpy(dtype=float) if "Volume" in df.columns else np.zeros(len(df))
+    columns["Volume"] = np.nan_to_num(volume, nan=0.0).clip(0).astype(np.uint64)
+    return columns, {"rows": len(df), "tz": tz}
+
+
+def bounds(ts, start=None, end=None):
+    """
+    Row range [lo, hi) holding every bar on local dates [start, end]. Timestamps are UTC, so the range
+    has a day of slack on each side; callers trim exactly (store.slice_range).
+    """
+    lo = 0 if start is None else int(np.searchsorted(ts, pd.Timestamp(start).value - _DAY_NS))
+    hi = len(ts) if end is None else int(np.searchsorted(ts, pd.Timestamp(end).value + 2 * _DAY_NS))
+    return lo, hi
+
+
+def _index(ts, tz):
+    idx = pd.DatetimeIndex(np.asarray(ts, dtype=np.int64).view("datetime64[ns]"), name="Datetime" if tz else "Date")
+    return idx.tz_localize("UTC").tz_convert(tz) if tz else idx
+
+
+def frame(columns, meta, lo=0, hi=None):
+    """Rows [lo, hi) as a float64 OHLCV frame; only these rows are read from disk."""
+    rows = slice(lo, hi)
+    data = {column: np.asarray(columns[column][rows], dtype=float) for column in PRICE_COLUMNS}
+    data["Volume"] = np.asarray(columns["Volume"][rows]).astype(np.int64)
+    return pd.DataFrame(data, index=_index(columns["ts"][rows], meta.get("tz")))
+
+
+def read(part, start=None, end=None):
+    """(bars, coverage) for local dates [start, end] (everything when omitted), or (empty, None)."""
+    columns, meta = open_columns(part)
+    if columns is None:
+        return pd.DataFrame(), None
+    return frame(columns, meta, *bounds(columns["ts"], start, end)), coverage(meta)
+
+
+def _append(part, gen, keep, new):
+    for column, dtype in COLUMNS.items():
+        path = _path(part, column, gen)
+        with open(path, "r+b" if path.exists() else "wb") as fh:
+            fh.truncate(keep * np.dtype(dtype).itemsize)
+            fh.seek(0, os.SEEK_END)
+            fh.write(np.ascontiguousarray(new[column], dtype=dtype).tobytes())
+
+
+def write(part, frames, cov):
+    """
+    Merge bar frames into a partition and record cov, the inclusive (start, end) dates now covered.
+    New bars after the stored ones are appended past the visible rows; replacing a stored tail copies
+    the kept rows into a new generation and appends there; anything earlier rewrites the partition as a
+    new generation. A partition that fails validation is left on disk and a fresh generation started
+    next to it. Writers in one process are serialised.
+    """
+    with _locks_guard:
+        lock = _locks.setdefault(str(part), threading.Lock())
+    with lock:
+        return _write(part, frames, cov)
+
+
+def _write(part, frames, cov):
+    frames = [df for df in frames if df is not None and not df.empty]
+    part.mkdir(parents=True, exist_ok=True)
+    columns, meta = open_columns(part)
+    old_gen = None
+    if meta is None:
+        # missing or damaged: nothing is deleted, the new bars go into a generation of their own
+        columns, meta = None, {"rows": 0, "gen": _next_gen(part, _read_meta(part)), "tz": None}
+
+    if frames:
+        new_df = pd.concat(frames)
+        new_df = new_df[~new_df.index.duplicated(keep="last")].sort_index()
+        new, new_meta = columns_from_frame(new_df)
+        meta["tz"] = meta["tz"] or new_meta["tz"]
+        rows = meta["rows"]
+        ts = columns["ts"] if rows else np.empty(0, dtype=np.int64)
+        first, last = new["ts"][0], new["ts"][-1]
+        if rows == 0 or first > ts[-1]:
+            keep = rows
+        elif first >= ts[0] and last >= ts[-1]:
+            # the fetch re-sent the stored tail (e.g. a still-forming last bar); replace it
+            keep = int(np.searchsorted(ts, first))
+        else:
+            keep = None
+
+        if keep == rows:
+            del columns, ts
+            _append(part, meta["gen"], keep, new)
+            meta["rows"] = keep + len(new_df)
+        elif keep is not None:
+            del columns, ts
+            old_gen, meta["gen"] = meta["gen"], _next_gen(part, meta)
+            for column in COLUMNS:
+                shutil.copyfile(_path(part, column, old_gen), _path(part, column, meta["gen"]))
+            _append(part, meta["gen"], keep, new)
+            meta["rows"] = keep + len(new_df)
+        else:
+            merged = pd.concat([frame(columns, meta), new_df])
+            del columns, ts
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            old_gen, meta["gen"] = meta["gen"], _next_gen(part, meta)
+            _append(part, meta["gen"], 0, columns_from_frame(merged)[0])
+            meta["rows"] = len(merged)
+
+    meta["coverage"] = [cov[0].isoformat(), cov[1].isoformat()]
+    _write_meta(part, meta)
+    if old_gen is not None:
+        for column in COLUMNS:
+            _path(part, column, old_gen).unlink(missing_ok=True)
+    return meta
+
+
+def can_resample(source, target):
+    """Whether `target` bars can be aggregated exactly from `source` bars."""
+    if source == target:
+        return False
+    if target in MINUTES:
+        return source in MINUTES and MINUTES[target] > MINUTES[source] and MINUTES[target] % MINUTES[source] == 0
+    if target == "1d":
+        return source in MINUTES
+    if target in ("1wk", "1mo"):
+        return source in MINUTES or source == "1d"
+    return False
+
+
+def _bucket_labels(local, interval):
+    """Bucket key per bar (local wall-clock ns) and a function mapping keys to local bucket starts."""
+    if interval in MINUTES:
+        # buckets start at the session open rather than on the clock hour (1h: 09:30, 10:30, ...)
+        step, offset = MINUTES[interval] * _MINUTE_NS, MARKET_OPEN_MINUTE * _MINUTE_NS
+        return (local - offset) // step, lambda keys: keys * step + offset
+    days = local // _DAY_NS
+    if interval == "1d":
+        return days, lambda keys: keys * _DAY_NS
+    if interval == "1wk":
+        # 1970-01-01 was a Thursday; shifting by 3 days starts weeks on Monday like Yahoo's weekly bars
+        return (days + 3) // 7, lambda keys: (keys * 7 - 3) * _DAY_NS
+    months = local.view("datetime64[ns]").astype("datetime64[M]").astype(np.int64)
+    return months, lambda keys: keys.astype("datetime64[M]").astype("datetime64[ns]").astype(np.int64)
+
+
+def resample(columns, meta, interval, start=None, end=None):
+    """
+    Aggregate the bars on local dates [start, end] into `interval` bars with ufunc.reduceat:
+    first open, max high, min low, last close, summed volume. Minute buckets start at the session open
+    (MARKET_OPEN_MINUTE); daily and coarser bars are labelled with their (naive) first calendar day, like Yahoo's.
+    """
+    lo, hi = bounds(columns["ts"], start, end)
+    ts = np.asarray(columns["ts"][lo:hi])
+    tz = meta.get("tz")
+    local = ts
+    if tz and len(ts):
+        local = pd.DatetimeIndex(ts.view("datetime64[ns]")).tz_localize("UTC").tz_convert(tz).tz_localize(None).asi8
+    keep = np.ones(len(ts), dtype=bool)
+    if start is not None:
+        keep &= local >= pd.Timestamp(start).value
+    if end is not None:
+        keep &= local < pd.Timestamp(end).value + _DAY_NS
+    if not keep.any():
+        return pd.DataFrame(columns=[*PRICE_COLUMNS, "Volume"])
+
+    ts, local = ts[keep], local[keep]
+    keys, label = _bucket_labels(local, interval)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    ends = np.append(starts[1:], len(keys)) - 1
+    take = lambda column: np.asarray(columns[column][lo:hi])[keep]
+    high, low, volume = take("High"), take("Low"), take("Volume")
+    data = {
+        "Open": take("Open")[starts].astype(float),
+        "High": np.maximum.reduceat(high, starts).astype(float),
+        "Low": np.minimum.reduceat(low, starts).astype(float),
+        "Close": take("Close")[ends].astype(float),
+        "Volume": np.add.reduceat(volume, starts).astype(np.int64),
+    }
+    if interval in MINUTES:
+        # UTC label = first bar's UTC time minus its offset into the local bucket (no DST ambiguity)
+        first = keys[starts]
+        index = _index(ts[starts] - (local[starts] - label(first)), tz)
+    else:
+        index = pd.DatetimeIndex(label(keys[starts]).view("datetime64[ns]"), name="Date")
+    return pd.DataFrame(data, index=index)
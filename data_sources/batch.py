@@ -0,0 +1,51 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from . import store, yahoo, alpha_vantage, polygon, finnhub
+
+PROVIDERS = {
+    "yahoo": yahoo,
+    "alpha_vantage": alpha_vantage,
+    "polygon": polygon,
+    "finnhub": finnhub,
+}
+
+
+def load_many(source, tickers, start, end, interval, api_key="", max_workers=8):
+    """
+    Fetch all tickers at once and return ({ticker: frame}, {ticker: exception}).
+    Yahoo uses multi-symbol downloads; the keyed providers run on a bounded thread pool.
+    A ticker that fails or has no bars in the range is reported in the errors dict.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if source not in PROVIDERS:
+        raise ValueError(f"Unknown data source: {source}")
+    if not tickers:
+        return {}, {}
+
+    if source == "yahoo":
+        frames, errors = yahoo.load_many(tickers, start, end, interval)
+    else:
+        module = PROVIDERS[source]
+        reason = module._unavailable_reason(interval, api_key)
+        if reason:
+            return {}, {t: RuntimeError(reason) for t in tickers}
+
+        def fetch(ticker, s, e, i):
+            return module._fetch(ticker, s, e, i, api_key=api_key)
+
+        frames, errors = {}, {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers)))) as pool:
+            # each task runs in a copy of the caller's context, so it records into the caller's instrumentation
+            futures = {t: pool.submit(contextvars.copy_context().run, store.load, source, t, start, end, interval,
+                                      fetch) for t in tickers}
+            for ticker, future in futures.items():
+                try:
+                    frames[ticker] = future.result()
+                except Exception as exc:
+                    errors[ticker] = exc
+
+    for ticker in [t for t, df in frames.items() if df.empty]:
+        frames.pop(ticker)
+        errors[ticker] = LookupError(f"{ticker}: no bars between {start} and {end}")
+    return frames, errors
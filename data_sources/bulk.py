@@ -0,0 +1,137 @@
+"""
+Shared plumbing for the bulk HTTP loaders (Polygon, Finnhub): a pooled keep-alive session, date-range
+chunking fetched on a thread pool, and JSON parsing straight into typed numpy columns.
+"""
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from config.settings import MARKET_TZ
+
+POOL_SIZE = 32
+CHUNK_BYTES = 1 << 16
+
+_NUMBER = rb'\s*:\s*(-?[0-9.eE+]+)'
+_session = None
+_session_lock = threading.Lock()
+
+
+def session():
+    """One requests.Session for all bulk loaders, with enough pooled keep-alive connections for their threads."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def date_chunks(start, end, days):
+    """Split the inclusive date range [start, end] into consecutive inclusive chunks of at most `days` days."""
+    chunks = []
+    while start <= end:
+        stop = min(end, start + timedelta(days=days - 1))
+        chunks.append((start, stop))
+        start = stop + timedelta(days=1)
+    return chunks
+
+
+def fetch_chunks(fetch_chunk, start, end, days, max_workers):
+    """fetch_chunk(start, end) -> [columns, ...] over every chunk of the range, concurrently; pages in date order."""
+    chunks = date_chunks(start, end, days)
+    if len(chunks) == 1 or max_workers <= 1:
+        return [page for s, e in chunks for page in fetch_chunk(s, e)]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        return [page for pages in pool.map(lambda c: fetch_chunk(*c), chunks) for page in pages]
+
+
+def _json_string(segment, key):
+    m = re.search(rb'"%s"\s*:\s*"((?:[^"\\]|\\.)*)"' % key.encode(), segment)
+    return json.loads(b'"' + m.group(1) + b'"') if m else None
+
+
+def scan_rows(chunks, fields, strings=()):
+    """
+    Parse a streamed JSON body whose rows are flat objects of numbers (e.g. Polygon's
+    {"t": .., "o": .., ...}) into float64 columns as the bytes arrive. Each complete stretch of rows
+    is regex-scanned once per field, so no per-row dicts or Python floats are built. A row missing one
+    of the fields raises ValueError.
+    `fields` maps JSON keys to column names; top-level string fields named in `strings` are returned too.
+    """
+    patterns = {name: re.compile(rb'"%s"' % key.encode() + _NUMBER) for key, name in fields.items()}
+    parts = {name: [] for name in patterns}
+    found = {}
+
+    def scan(segment):
+        for name, pattern in patterns.items():
+            values = pattern.findall(segment)
+            if values:
+                parts[name].append(np.array(values, dtype=np.float64))
+        for key in strings:
+            if key not in found:
+                value = _json_string(segment, key)
+                if value is not None:
+                    found[key] = value
+
+    buf = b""
+    for chunk in chunks:
+        buf += chunk
+        # rows contain no nested objects, so everything up to the last '}' is complete rows
+        cut = buf.rfind(b"}") + 1
+        if cut:
+            scan(buf[:cut])
+            buf = buf[cut:]
+    scan(buf)
+
+    columns = {name: np.concatenate(p) if p else np.empty(0) for name, p in parts.items()}
+    if len({len(c) for c in columns.values()}) > 1:
+        raise ValueError(f"rows with missing fields: {({n: len(c) for n, c in columns.items()})}")
+    return columns, found
+
+
+def parse_arrays(body, fields):
+    """Columns from a JSON body of parallel number arrays (e.g. Finnhub's {"c": [..], "t": [..]})."""
+    columns = {}
+    for key, name in fields.items():
+        m = re.search(rb'"%s"\s*:\s*\[([^\]]*)\]' % key.encode(), body)
+        columns[name] = np.fromstring(m.group(1), sep=",") if m and m.group(1).strip() else np.empty(0)
+    if len({len(c) for c in columns.values()}) > 1:
+        raise ValueError("candle arrays differ in length")
+    return columns
+
+
+def to_frame(pages, unit, intraday, tz=MARKET_TZ, date_tz=None):
+    """
+    One OHLCV frame in yahoo.load_data's schema from column pages ({'ts', 'Open', ..., 'Volume'} arrays),
+    copied once into preallocated arrays. Intraday bars are indexed in the exchange timezone `tz`;
+    daily and coarser bars by their naive date in `date_tz` (default `tz`).
+    """
+    names = ["ts", "Open", "High", "Low", "Close", "Volume"]
+    total = sum(len(page["ts"]) for page in pages)
+    if not total:
+        return pd.DataFrame()
+    out = {name: np.empty(total, dtype=np.float64) for name in names}
+    pos = 0
+    for page in pages:
+        n = len(page["ts"])
+        for name in names:
+            out[name][pos:pos + n] = page[name]
+        pos += n
+
+    idx = pd.to_datetime(out.pop("ts").astype(np.int64), unit=unit, utc=True).as_unit("ns")
+    if intraday:
+        idx = idx.tz_convert(tz).rename("Datetime")
+    else:
+        idx = idx.tz_convert(date_tz or tz).tz_localize(None).normalize().rename("Date")
+    out["Volume"] = np.rint(np.nan_to_num(out["Volume"])).astype(np.int64)
+    df = pd.DataFrame(out, index=idx)
+    df = df[~df.index.duplicated(keep="last")]
+    return df if df.index.is_monotonic_increasing else df.sort_index()
@@ -1,7 +1,83 @@
+import re
+
 import pandas as pd
-from streamlit import cache_data
+from config.settings import FINNHUB_URL, FINNHUB_RATE_LIMIT, MARKET_TZ
+from utils.caching import cache_data
+from . import bulk, store
+from .scheduler import RateLimitError, Scheduler
+
+try:
+    import requests  # noqa: F401 -- HTTP client behind bulk.session()
+    _AVAILABLE = True
+except Exception:
+    _AVAILABLE = False
+
+# interval -> (candle resolution, days per request)
+_RESOLUTIONS = {"1m": ("1", 30), "5m": ("5", 90), "15m": ("15", 180), "30m": ("30", 365), "60m": ("60", 365),
+                "1h": ("60", 365), "1d": ("D", 36500), "1wk": ("W", 36500), "1mo": ("M", 36500)}
+_FIELDS = {"t": "ts", "o": "Open", "h": "High", "l": "Low", "c": "Close", "v": "Volume"}
+_STATUS = re.compile(rb'"s"\s*:\s*"(\w+)"')
+# date chunks of one ticker fetched at once
+MAX_WORKERS = 4
+
+BASE_URL = FINNHUB_URL
+# one token bucket per API key; replace (e.g. with a faster Scheduler) to point at a stub server
+SCHEDULER = Scheduler(*FINNHUB_RATE_LIMIT)
+
+def _intraday(interval):
+    return _RESOLUTIONS[interval][0].isdigit()
+
+def _get(params, api_key):
+    resp = bulk.session().get(f"{BASE_URL}/stock/candle", params=dict(params, token=api_key), timeout=60)
+    if resp.status_code == 429:
+        retry_after = resp.headers.get("Retry-After")
+        raise RateLimitError(f"{params['symbol']}: Finnhub HTTP 429",
+                             retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+    if resp.status_code != 200:
+        raise RuntimeError(f"{params['symbol']}: Finnhub HTTP {resp.status_code}: {resp.text[:200]}")
+    body = resp.content
+    status = _STATUS.search(body)
+    if status is None:
+        raise RuntimeError(f"{params['symbol']}: {body[:200].decode(errors='replace')}")
+    if status.group(1) == b"no_data":
+        return None
+    return bulk.parse_arrays(body, _FIELDS)
+
+def _fetch_chunk(ticker, start, end, interval, api_key):
+    # intraday days are exchange days; daily candles are stamped at midnight UTC
+    tz = MARKET_TZ if _intraday(interval) else "UTC"
+    params = {"symbol": ticker, "resolution": _RESOLUTIONS[interval][0],
+              "from": int(pd.Timestamp(start, tz=tz).timestamp()),
+              "to": int((pd.Timestamp(end, tz=tz) + pd.Timedelta(days=1)).timestamp()) - 1}
+    columns = SCHEDULER.run(api_key, tuple(params.items()), lambda: _get(params, api_key))
+    return [columns] if columns else []
+
+def _fetch(ticker, start, end, interval, api_key=""):
+    if interval not in _RESOLUTIONS:
+        raise ValueError(f"Unsupported interval: {interval}")
+    start, end = store._to_date(start), store._to_date(end)
+    pages = bulk.fetch_chunks(lambda s, e: _fetch_chunk(ticker, s, e, interval, api_key), start, end,
+                              _RESOLUTIONS[interval][1], MAX_WORKERS)
+    return bulk.to_frame(pages, "s", intraday=_intraday(interval), date_tz="UTC")
+
+def _unavailable_reason(interval, api_key=""):
+    if not _AVAILABLE:
+        return "requests package is not installed"
+    if not api_key:
+        return "missing Finnhub API key"
+    if interval not in _RESOLUTIONS:
+        return f"unsupported interval {interval}"
+    return None
 
 @cache_data
 def load_data(ticker, start, end, interval, api_key=""):
-    # Placeholder: implement Finnhub fetching if you have an API key.
-    return pd.DataFrame()
+    if _unavailable_reason(interval, api_key):
+        return pd.DataFrame()
+    try:
+        return store.load("finnhub", ticker, start, end, interval,
+                          lambda t, s, e, i: _fetch(t, s, e, i, api_key=api_key))
+    except RateLimitError:
+        # still throttled after the scheduler's retries: raise rather than cache an empty frame
+        raise
+    except Exception:
+        return pd.DataFrame()
@@ -1,8 +1,107 @@
+import json
+from urllib.parse import quote
+
+import numpy as np
 import pandas as pd
-from streamlit import cache_data
+from config.settings import POLYGON_URL, POLYGON_RATE_LIMIT
+from utils.caching import cache_data
+from . import bulk, store
+from .barstore import MINUTES
+from .scheduler import RateLimitError, Scheduler
+
+try:
+    import requests  # noqa: F401 -- HTTP client behind bulk.session()
+    _AVAILABLE = True
+except Exception:
+    _AVAILABLE = False
+
+_SPANS = {"1d": (1, "day"), "1wk": (1, "week"), "1mo": (1, "month"), "3mo": (3, "month")}
+_FIELDS = {"t": "ts", "o": "Open", "h": "High", "l": "Low", "c": "Close", "v": "Volume"}
+# the aggregates endpoint's maximum page size; longer ranges continue through next_url
+PAGE_LIMIT = 50000
+# date chunks of one ticker fetched at once
+MAX_WORKERS = 4
+
+BASE_URL = POLYGON_URL
+# one token bucket per API key; replace (e.g. with a faster Scheduler) to point at a stub server
+SCHEDULER = Scheduler(*POLYGON_RATE_LIMIT)
+
+def _span(interval):
+    return (MINUTES[interval], "minute") if interval in MINUTES else _SPANS[interval]
+
+def _chunk_days(interval):
+    # about one page of minute bars (extended hours included) per chunk
+    return min(30 * MINUTES[interval], 730) if interval in MINUTES else 36500
+
+def _get(url, params, api_key):
+    resp = bulk.session().get(url, params=dict(params, apiKey=api_key), stream=True, timeout=60)
+    with resp:
+        if resp.status_code == 429:
+            retry_after = resp.headers.get("Retry-After")
+            raise RateLimitError(f"Polygon HTTP 429: {url}",
+                                 retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+        if resp.status_code != 200:
+            raise RuntimeError(f"Polygon HTTP {resp.status_code}: {resp.text[:200]}")
+        chunks = []
+
+        def body():
+            for chunk in resp.iter_content(bulk.CHUNK_BYTES):
+                chunks.append(chunk)
+                yield chunk
+
+        try:
+            columns, extra = bulk.scan_rows(body(), _FIELDS, ("next_url", "status", "error"))
+        except ValueError:
+            # some row lacks a field: fall back to a full parse, leaving the gaps as NaN
+            payload = json.loads(b"".join(chunks))
+            rows = payload.get("results") or []
+            columns = {name: np.array([r.get(k, np.nan) for r in rows], dtype=np.float64) for k, name in _FIELDS.items()}
+            extra = {k: payload[k] for k in ("next_url", "status", "error") if k in payload}
+    if extra.get("status") not in (None, "OK", "DELAYED"):
+        raise RuntimeError(f"Polygon {extra.get('status')}: {extra.get('error', '')}")
+    return columns, extra.get("next_url")
+
+def _fetch_chunk(ticker, start, end, interval, api_key):
+    multiplier, timespan = _span(interval)
+    url = f"{BASE_URL}/v2/aggs/ticker/{quote(ticker)}/range/{multiplier}/{timespan}/{start}/{end}"
+    params = {"adjusted": "true", "sort": "asc", "limit": PAGE_LIMIT}
+    pages = []
+    while url:
+        page_url, page_params = url, params
+        columns, url = SCHEDULER.run(api_key, (page_url, tuple(page_params.items())),
+                                     lambda: _get(page_url, page_params, api_key))
+        pages.append(columns)
+        # next_url carries the cursor and the original query; only the key has to be added again
+        params = {}
+    return pages
+
+def _fetch(ticker, start, end, interval, api_key=""):
+    if interval not in MINUTES and interval not in _SPANS:
+        raise ValueError(f"Unsupported interval: {interval}")
+    start, end = store._to_date(start), store._to_date(end)
+    pages = bulk.fetch_chunks(lambda s, e: _fetch_chunk(ticker, s, e, interval, api_key), start, end,
+                              _chunk_days(interval), MAX_WORKERS)
+    # t is the bar's start in ms; daily and coarser bars start at midnight exchange time
+    return bulk.to_frame(pages, "ms", intraday=interval in MINUTES)
+
+def _unavailable_reason(interval, api_key=""):
+    if not _AVAILABLE:
+        return "requests package is not installed"
+    if not api_key:
+        return "missing Polygon API key"
+    if interval not in MINUTES and interval not in _SPANS:
+        return f"unsupported interval {interval}"
+    return None
 
 @cache_data
 def load_data(ticker, start, end, interval, api_key=""):
-    # Placeholder: implement Polygon.io fetching if you have an API key.
-    # Return empty DataFrame for now.
-    return pd.DataFrame()
+    if _unavailable_reason(interval, api_key):
+        return pd.DataFrame()
+    try:
+        return store.load("polygon", ticker, start, end, interval,
+                          lambda t, s, e, i: _fetch(t, s, e, i, api_key=api_key))
+    except RateLimitError:
+        # still throttled after the scheduler's retries: raise rather than cache an empty frame
+        raise
+    except Exception:
+        return pd.DataFrame()
@@ -0,0 +1,113 @@
+"""
+Client-side request scheduling for rate-limited providers: a token bucket per API key, coalescing of
+identical in-flight requests and retries with exponential backoff when the provider throttles.
+"""
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+
+class RateLimitError(RuntimeError):
+    """The provider rejected a request for exceeding its quota; retry_after is in seconds if it said."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` calls per `per` seconds with bursts of up to `burst`."""
+
+    def __init__(self, rate, per=60.0, burst=None):
+        self.rate = rate / per
+        self.capacity = float(burst or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a token is available; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        """Hold back every caller for about `seconds` (the provider said we are over quota)."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class Scheduler:
+    """
+    Runs provider calls under a per-key TokenBucket. Concurrent calls with the same (key, request)
+    share one provider call and its result; a RateLimitError pauses the key's bucket for the
+    server's Retry-After (or an exponential, jittered backoff) and retries up to max_retries times.
+    """
+
+    def __init__(self, rate, per=60.0, burst=None, max_retries=5, backoff=1.0, max_backoff=60.0):
+        self.rate, self.per, self.burst = rate, per, burst
+        self.max_retries, self.backoff, self.max_backoff = max_retries, backoff, max_backoff
+        self.buckets, self.inflight = {}, {}
+        self.stats = {"calls": 0, "coalesced": 0, "throttled": 0, "waited": 0.0}
+        self.lock = threading.Lock()
+
+    def bucket(self, key):
+        with self.lock:
+            if key not in self.buckets:
+                self.buckets[key] = TokenBucket(self.rate, self.per, self.burst)
+            return self.buckets[key]
+
+    def run(self, key, request, fn):
+        """Return fn() for a hashable `request` description, sharing the call with identical in-flight requests."""
+        with self.lock:
+            future = self.inflight.get((key, request))
+            owner = future is None
+            if owner:
+                future = self.inflight[(key, request)] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not owner:
+            return future.result()
+        try:
+            result = self._call(key, fn)
+            future.set_result(result)
+            return result
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop((key, request), None)
+
+    def _call(self, key, fn):
+        bucket = self.bucket(key)
+        for attempt in range(self.max_retries + 1):
+            waited = bucket.acquire()
+            with self.lock:
+                self.stats["calls"] += 1
+                self.stats["waited"] += waited
+            try:
+                return fn()
+            except RateLimitError as exc:
+                with self.lock:
+                    self.stats["throttled"] += 1
+                if attempt == self.max_retries:
+                    raise
+                delay = exc.retry_after
+                if delay is None:
+                    delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                bucket.pause(delay)
@@ -0,0 +1,222 @@
+import json
+import os
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+from config.settings import DATA_STORE_DIR
+from utils.instrumentation import instrument, record_cache
+from . import barstore
+
+try:
+    import pyarrow  # noqa: F401 -- parquet engine
+    _AVAILABLE = True
+except Exception:
+    _AVAILABLE = False
+
+ONE_DAY = timedelta(days=1)
+# intervals that coarser bars may be aggregated from, preferring the fewest rows to scan
+RESAMPLE_SOURCES = ("1d", "90m", "1h", "60m", "30m", "15m", "5m", "2m", "1m")
+# providers whose intraday bars are adjusted differently from their daily and coarser ones: yfinance's
+# auto_adjust back-adjusts daily+ prices for dividends but intraday prices only for splits
+INTRADAY_BASIS_DIFFERS = {"yahoo"}
+
+
+def _to_date(value):
+    return pd.Timestamp(value).date()
+
+
+def _partition(provider, ticker, interval):
+    safe = str(ticker).replace("/", "_").replace("\\", "_")
+    return Path(DATA_STORE_DIR) / provider / f"interval={interval}" / f"ticker={safe}"
+
+
+def _naive_index(df):
+    idx = pd.DatetimeIndex(df.index)
+    return idx.tz_localize(None) if idx.tz is not None else idx
+
+
+def slice_range(df, start, end):
+    """Rows whose (local) date lies in the inclusive range [start, end]."""
+    if df.empty:
+        return df
+    idx = _naive_index(df)
+    mask = (idx >= pd.Timestamp(start)) & (idx < pd.Timestamp(end + ONE_DAY))
+    return df.loc[mask]
+
+
+def read(provider, ticker, interval, start=None, end=None):
+    """
+    Return (bars, coverage) for a partition; coverage is an inclusive (start, end)
+    date pair of what has been requested from the provider, or None if nothing is stored.
+    Intraday partitions live in the memory-mapped barstore, and only the bars around
+    [start, end] are read from them; Parquet partitions are always read whole.
+    """
+    part = _partition(provider, ticker, interval)
+    if barstore.handles(interval):
+        return barstore.read(part, start, end)
+    bars_path, cov_path = part / "bars.parquet", part / "coverage.json"
+    if not (_AVAILABLE and bars_path.exists() and cov_path.exists()):
+        return pd.DataFrame(), None
+    try:
+        bars = pd.read_parquet(bars_path)
+        with open(cov_path) as fh:
+            cov = json.load(fh)
+        return bars, (date.fromisoformat(cov["start"]), date.fromisoformat(cov["end"]))
+    except Exception:
+        # a corrupt partition is treated as empty and rebuilt on the next write
+        return pd.DataFrame(), None
+
+
+def missing_ranges(bars, coverage, start, end, today=None):
+    """
+    Inclusive date ranges that still have to be fetched to serve [start, end].
+    The last stored bar is always refetched when the range touches today, since it may still be forming.
+    """
+    today = today or date.today()
+    if end < start:
+        return []
+    if coverage is None:
+        return [(start, end)]
+    cov_start, cov_end = coverage
+    ranges = []
+    if start < cov_start:
+        ranges.append((start, cov_start - ONE_DAY))
+    if end > cov_end or end >= today:
+        tail = _naive_index(bars)[-1].date() if len(bars) else cov_end + ONE_DAY
+        if tail <= end:
+            ranges.append((tail, end))
+    return ranges
+
+
+def write(provider, ticker, interval, bars, coverage, fetched, today=None):
+    """Merge fetched [((start, end), frame), ...] into a partition and persist it atomically."""
+    today = today or date.today()
+    frames = [bars] + [df for _, df in fetched if df is not None and not df.empty]
+    frames = [df for df in frames if not df.empty]
+    merged = pd.concat(frames) if frames else pd.DataFrame()
+    if not merged.empty:
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+
+    # Fetchers raise when the provider fails, so an empty answer means there are no bars in that
+    # range (e.g. before a listing) and it counts as covered, instead of being asked for again.
+    starts = [coverage[0]] if coverage else []
+    ends = [coverage[1]] if coverage else []
+    for r, df in fetched:
+        if df is None:
+            continue
+        starts.append(r[0])
+        ends.append(min(r[1], today))
+        if not df.empty:
+            # providers that return more than was asked for (e.g. full history) extend the coverage
+            idx = _naive_index(df)
+            starts.append(idx[0].date())
+            ends.append(min(idx[-1].date(), today))
+    if not starts:
+        return merged, coverage
+    new_coverage = (min(starts), max(ends))
+
+    if barstore.handles(interval):
+        barstore.write(_partition(provider, ticker, interval), [df for _, df in fetched], new_coverage)
+    elif _AVAILABLE:
+        part = _partition(provider, ticker, interval)
+        part.mkdir(parents=True, exist_ok=True)
+        # per-writer temp names: concurrent sessions may refresh the same partition
+        suffix = f".{os.getpid()}-{threading.get_ident()}.tmp"
+        tmp = part / f"bars.parquet{suffix}"
+        merged.to_parquet(tmp)
+        os.replace(tmp, part / "bars.parquet")
+        # coverage is written last so a crash in between never claims bars that were not saved
+        tmp = part / f"coverage.json{suffix}"
+        with open(tmp, "w") as fh:
+            json.dump({"start": new_coverage[0].isoformat(), "end": new_coverage[1].isoformat()}, fh)
+        os.replace(tmp, part / "coverage.json")
+    return merged, new_coverage
+
+
+def provider_range(start, end, end_inclusive=True):
+    """Convert an inclusive date range back to the provider's (start, end) convention."""
+    return (start, end) if end_inclusive else (start, end + ONE_DAY)
+
+
+def normalize_range(start, end, end_inclusive=True):
+    start, end = _to_date(start), _to_date(end)
+    return (start, end) if end_inclusive else (start, end - ONE_DAY)
+
+
+def same_basis(provider, source, target):
+    """Whether `source` and `target` bars of a provider carry the same price adjustments."""
+    return provider not in INTRADAY_BASIS_DIFFERS or barstore.handles(source) == barstore.handles(target)
+
+
+def resampled(provider, ticker, interval, start, end):
+    """
+    (bars, through): `interval` bars for [start, through] aggregated from a finer stored interval with
+    the same price adjustments whose coverage includes `start`, reaching as far towards `end` as any
+    such interval does; (None, None) if there is none. Only settled days (before today) are served,
+    since the provider's newest bar may still be forming.
+    """
+    settled = min(end, date.today() - ONE_DAY)
+    if settled < start:
+        return None, None
+    best = None
+    for source in RESAMPLE_SOURCES:
+        if not barstore.can_resample(source, interval) or not same_basis(provider, source, interval):
+            continue
+        if barstore.handles(source):
+            columns, meta = barstore.open_columns(_partition(provider, ticker, source))
+            coverage = barstore.coverage(meta)
+        else:
+            bars, coverage = read(provider, ticker, source)
+            columns, meta = barstore.columns_from_frame(bars) if coverage else (None, None)
+        if coverage and coverage[0] <= start <= coverage[1]:
+            through = min(settled, coverage[1])
+            if best is None or through > best[0]:
+                best = (through, columns, meta)
+    if best is None:
+        return None, None
+    through, columns, meta = best
+    return barstore.resample(columns, meta, interval, start, through), through
+
+
+def plan(provider, ticker, interval, start, end):
+    """
+    How to serve [start, end]: (bars, coverage, ranges, view, fetch_start). A partition that already
+    covers the range serves it alone. Otherwise `view` (None if impossible) holds the settled days
+    aggregated from finer stored bars, and only [fetch_start, end] comes from the partition after
+    fetching `ranges`; those stay contiguous with its coverage.
+    """
+    bars, coverage = read(provider, ticker, interval, start, end)
+    ranges = missing_ranges(bars, coverage, start, end)
+    view, fetch_start = None, start
+    if ranges:
+        view, through = resampled(provider, ticker, interval, start, end)
+        if view is not None:
+            fetch_start = through + ONE_DAY
+            ranges = missing_ranges(bars, coverage, fetch_start, end)
+    return bars, coverage, ranges, view, fetch_start
+
+
+def serve(bars, view, fetch_start, end):
+    """The bars plan() described: the aggregated view followed by the partition's [fetch_start, end]."""
+    native = slice_range(bars, fetch_start, end)
+    if view is None:
+        return native
+    return view if native.empty else pd.concat([view, native[view.columns]])
+
+
+@instrument("store.load", rows_arg=None)
+def load(provider, ticker, start, end, interval, fetch, end_inclusive=True):
+    """
+    Serve bars for [start, end] from the on-disk store, aggregating settled days from finer stored
+    bars where possible and calling fetch(ticker, start, end, interval) only for the rest.
+    end_inclusive describes the provider's convention for `end` (yfinance's is exclusive).
+    """
+    start, end = normalize_range(start, end, end_inclusive)
+    bars, coverage, ranges, view, fetch_start = plan(provider, ticker, interval, start, end)
+    record_cache("store", not ranges, ticker)
+    if ranges:
+        fetched = [(r, fetch(ticker, *provider_range(*r, end_inclusive), interval)) for r in ranges]
+        bars, _ = write(provider, ticker, interval, bars, coverage, fetched)
+    return serve(bars, view, fetch_start, end)
@@ -1,10 +1,128 @@
+import ast
+import logging
+import threading
+
 import yfinance as yf
 import pandas as pd
-from streamlit import cache_data
+from utils.caching import cache_data
+from utils.instrumentation import instrument, record_cache
+from . import store
+
+# yf.download swallows per-symbol failures and only logs them ("['AAPL', 'MSFT']: <error>") on its
+# shared logger, so one download's log lines are collected while no other download runs
+_download_lock = threading.Lock()
+# what yfinance logs for a valid symbol with no bars in the range (e.g. before its listing)
+_NO_DATA = ("no price data found", "pricesmissing", "doesn't exist", "does not exist")
+
+
+class _ErrorLog(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.errors = {}
+
+    def emit(self, record):
+        head, sep, error = record.getMessage().partition("]: ")
+        if sep and head.startswith("["):
+            try:
+                symbols = ast.literal_eval(head + "]")
+            except (ValueError, SyntaxError):
+                return
+            self.errors.update({str(s).upper(): error for s in symbols})
+
+
+def _download(tickers, start, end, interval, **kwargs):
+    """yf.download plus {ticker: error message} for the symbols it failed on."""
+    log, logger = _ErrorLog(), logging.getLogger("yfinance")
+    with _download_lock:
+        logger.addHandler(log)
+        try:
+            raw = yf.download(tickers, start=start, end=end, interval=interval, auto_adjust=True, progress=False,
+                              **kwargs)
+        finally:
+            logger.removeHandler(log)
+    return raw, log.errors
+
+def _split(ticker, df, error):
+    """
+    A ticker's bars, or an exception if its download failed. Failures show up as an empty or all-NaN
+    frame; an empty frame without an error (or with a "no data" one) means no bars in the range.
+    """
+    df = df.dropna(how="all").dropna()
+    if df.empty and error is not None and not any(s in str(error).lower() for s in _NO_DATA):
+        return RuntimeError(f"{ticker}: {error}")
+    return df
+
+def _fetch(ticker, start, end, interval):
+    df, errors = _download(ticker, start, end, interval)
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    df = _split(ticker, df, errors.get(ticker.upper()))
+    if isinstance(df, Exception):
+        raise df
+    return df
+
+def _fetch_many(tickers, start, end, interval):
+    """One multi-symbol download; returns ({ticker: frame}, {ticker: exception})."""
+    raw, errors = _download(list(tickers), start, end, interval, group_by="ticker", threads=True)
+    frames, failed = {}, {}
+    for ticker in tickers:
+        error = errors.get(ticker.upper())
+        if isinstance(raw.columns, pd.MultiIndex):
+            present = ticker in raw.columns.get_level_values(0)
+            df = raw[ticker].copy() if present else pd.DataFrame()
+            if not present and error is None:
+                error = "missing from download"
+        else:
+            df = raw.copy()
+        df.columns.name = None
+        result = _split(ticker, df, error)
+        if isinstance(result, Exception):
+            failed[ticker] = result
+        else:
+            frames[ticker] = result
+    return frames, failed
+
+@instrument("yahoo.load_many")
+def load_many(tickers, start, end, interval):
+    """
+    Load many tickers through the store with one yf.download per distinct missing range,
+    so a warm store costs a single multi-symbol request for the newest bars. Settled days are
+    aggregated from finer stored bars with the same adjustments where possible, like store.load.
+    """
+    start, end = store.normalize_range(start, end, end_inclusive=False)
+    plans, frames = {}, {}
+    for ticker in tickers:
+        plans[ticker] = store.plan("yahoo", ticker, interval, start, end)
+        record_cache("store", not plans[ticker][2], ticker)
+
+    groups = {}
+    for ticker, (_, _, ranges, _, _) in plans.items():
+        for r in ranges:
+            groups.setdefault(r, []).append(ticker)
+
+    fetched, errors = {t: [] for t in plans}, {}
+    for r, group in groups.items():
+        try:
+            got, failed = _fetch_many(group, *store.provider_range(*r, end_inclusive=False), interval)
+        except Exception as exc:
+            got, failed = {}, {t: exc for t in group}
+        for ticker, df in got.items():
+            fetched[ticker].append((r, df))
+        errors.update(failed)
+
+    for ticker in plans:
+        if ticker in errors:
+            continue
+        bars, coverage, _, view, fetch_start = plans[ticker]
+        if fetched[ticker]:
+            bars, _ = store.write("yahoo", ticker, interval, bars, coverage, fetched[ticker])
+        frames[ticker] = store.serve(bars, view, fetch_start, end)
+    return frames, errors
 
 @cache_data
 def load_data(ticker, start, end, interval):
-    df = yf.download(ticker, start=start, end=end, interval=interval, auto_adjust=True, progress=False)
-    if not df.empty:
-        df.dropna(inplace=True)
-    return df
+    try:
+        # yfinance treats `end` as exclusive
+        return store.load("yahoo", ticker, start, end, interval, _fetch, end_inclusive=False)
+    except Exception:
+        return pd.DataFrame()
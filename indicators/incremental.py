@@ -0,0 +1,206 @@
+import math
+import numbers
+from collections import deque
+
+NAN = float('nan')
+
+
+class RollingMean:
+    """
+    Series.rolling(window).mean(), one value at a time.
+    Mirrors pandas' Kahan-compensated add/remove kernel (including its handling of
+    runs of equal values and sign clamping), so outputs are bit-identical to the batch version.
+    """
+
+    def __init__(self, window):
+        self.window = int(window)
+        self.values = deque(maxlen=self.window)
+        self.count = 0
+        self.sum_x = 0.
+        self.comp_add = 0.
+        self.comp_remove = 0.
+        self.nobs = 0
+        self.neg_ct = 0
+        self.prev_value = NAN
+        self.same_run = 0
+
+    def _add(self, val):
+        if val == val:
+            self.nobs += 1
+            y = val - self.comp_add
+            t = self.sum_x + y
+            self.comp_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1., val) < 0:
+                self.neg_ct += 1
+            if val == self.prev_value:
+                self.same_run += 1
+            else:
+                self.same_run = 1
+            self.prev_value = val
+
+    def _remove(self, val):
+        if val == val:
+            self.nobs -= 1
+            y = -val - self.comp_remove
+            t = self.sum_x + y
+            self.comp_remove = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1., val) < 0:
+                self.neg_ct -= 1
+
+    def update(self, val):
+        val = float(val)
+        if self.count == 0 or self.window == 1:
+            # pandas restarts the window state when consecutive windows do not overlap
+            self.sum_x = self.comp_add = self.comp_remove = 0.
+            self.nobs = self.neg_ct = 0
+            self.prev_value = val
+            self.same_run = 0
+        elif len(self.values) == self.window:
+            self._remove(self.values[0])
+        self.values.append(val)
+        self._add(val)
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self):
+        if self.count == 0 or self.nobs < self.window or self.nobs <= 0:
+            return NAN
+        result = self.sum_x / self.nobs
+        if self.same_run >= self.nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.
+        return result
+
+    def to_dict(self):
+        state = {k: v for k, v in vars(self).items() if k != 'values'}
+        state['values'] = list(self.values)
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        obj = cls(state['window'])
+        for k, v in state.items():
+            if k != 'values':
+                setattr(obj, k, v)
+        obj.values.extend(state['values'])
+        return obj
+
+
+class Ewm:
+    """Series.ewm(span=span, adjust=False).mean(), one value at a time, using pandas' recurrence."""
+
+    def __init__(self, span):
+        self.span = int(span)
+        self.alpha = 1. / (1. + (self.span - 1) / 2.)
+        self.count = 0
+        self.nobs = 0
+        self.weighted = NAN
+        self.old_wt = 1.
+
+    def update(self, cur):
+        cur = float(cur)
+        is_obs = cur == cur
+        if self.count == 0:
+            self.weighted = cur
+        else:
+            if self.weighted == self.weighted:
+                self.old_wt *= 1. - self.alpha
+                if is_obs:
+                    if self.weighted != cur:
+                        self.weighted = (self.old_wt * self.weighted + self.alpha * cur) / (self.old_wt + self.alpha)
+                    self.old_wt = 1.
+            elif is_obs:
+                self.weighted = cur
+        self.nobs += is_obs
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self):
+        return self.weighted if self.nobs >= 1 else NAN
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, state):
+        obj = cls(state['span'])
+        vars(obj).update(state)
+        return obj
+
+
+class IndicatorState:
+    """
+    Running SMA/EMA/RSI/MACD state that advances in O(1) per bar.
+    Seed it with from_history(df) and call update(bar) for each new close; every value equals
+    what compute_indicators would report for that bar over the full history. to_dict()/from_dict()
+    round-trip the state through JSON so a process can resume without replaying history.
+    """
+
+    def __init__(self, sma=20, ema=50, rsi=14, macd_fast=12, macd_slow=26, macd_signal=9):
+        self.params = dict(sma=int(sma), ema=int(ema), rsi=int(rsi),
+                           macd_fast=int(macd_fast), macd_slow=int(macd_slow), macd_signal=int(macd_signal))
+        self.sma = RollingMean(sma)
+        self.ema = Ewm(ema)
+        self.gain = RollingMean(rsi)
+        self.loss = RollingMean(rsi)
+        self.macd_fast = Ewm(macd_fast)
+        self.macd_slow = Ewm(macd_slow)
+        self.macd_signal = Ewm(macd_signal)
+        self.prev_close = NAN
+        self.last = {}
+
+    @classmethod
+    def from_history(cls, df, **params):
+        state = cls(**params)
+        closes = df['Close'] if hasattr(df, 'columns') else df
+        for close in closes:
+            state.update(close)
+        return state
+
+    def update(self, bar):
+        close = float(bar) if isinstance(bar, numbers.Real) else float(bar['Close'])
+        delta = close - self.prev_close
+        self.prev_close = close
+        avg_gain = self.gain.update(delta if delta > 0 else 0.0)
+        avg_loss = self.loss.update(-(delta if delta < 0 else 0.0))
+        rs = avg_gain / avg_loss if avg_loss == avg_loss and avg_loss != 0 else NAN
+        macd = self.macd_fast.update(close) - self.macd_slow.update(close)
+        signal = self.macd_signal.update(macd)
+        self.last = {
+            'Close': close,
+            'SMA': self.sma.update(close),
+            'EMA': self.ema.update(close),
+            'RSI': 100 - (100 / (1 + rs)),
+            'MACD': macd,
+            'MACD_signal': signal,
+            'MACD_hist': macd - signal,
+        }
+        return self.last
+
+    def to_dict(self):
+        return {
+            'params': dict(self.params),
+            'prev_close': self.prev_close,
+            'last': dict(self.last),
+            'sma': self.sma.to_dict(), 'ema': self.ema.to_dict(),
+            'gain': self.gain.to_dict(), 'loss': self.loss.to_dict(),
+            'macd_fast': self.macd_fast.to_dict(), 'macd_slow': self.macd_slow.to_dict(),
+            'macd_signal': self.macd_signal.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        obj = cls(**state['params'])
+        obj.prev_close = state['prev_close']
+        obj.last = dict(state['last'])
+        obj.sma, obj.gain, obj.loss = (RollingMean.from_dict(state[k]) for k in ('sma', 'gain', 'loss'))
+        obj.ema, obj.macd_fast, obj.macd_slow, obj.macd_signal = (
+            Ewm.from_dict(state[k]) for k in ('ema', 'macd_fast', 'macd_slow', 'macd_signal'))
+        return obj
@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
+from utils.instrumentation import instrument
 
+@instrument()
 def compute_indicators(df, sma=20, ema=50, rsi=14, macd_fast=12, macd_slow=26, macd_signal=9):
     data = df.copy()
     if 'Close' not in data.columns:
@@ -22,3 +24,49 @@ def compute_indicators(df, sma=20, ema=50, rsi=14, macd_fast=12, macd_slow=26, m
     data['MACD_signal'] = data['MACD'].ewm(span=int(macd_signal), adjust=False).mean()
     data['MACD_hist'] = data['MACD'] - data['MACD_signal']
     return data
+
+PANEL_FIELDS = ['Close', 'SMA', 'EMA', 'RSI', 'MACD', 'MACD_signal', 'MACD_hist']
+
+def close_matrix(prices):
+    """Wide time x ticker close prices from a wide frame, a (field, ticker) MultiIndex frame or {ticker: ohlcv}."""
+    if isinstance(prices, dict):
+        closes = {t: df['Close'] for t, df in prices.items() if 'Close' in getattr(df, 'columns', [])}
+        return pd.concat(closes, axis=1).sort_index() if closes else pd.DataFrame()
+    if isinstance(prices.columns, pd.MultiIndex):
+        for level in range(prices.columns.nlevels):
+            if 'Close' in prices.columns.get_level_values(level):
+                return prices.xs('Close', level=level, axis=1)
+        raise ValueError("MultiIndex price frame has no 'Close' field")
+    return prices
+
+@instrument()
+def compute_indicators_panel(prices, sma=20, ema=50, rsi=14, macd_fast=12, macd_slow=26, macd_signal=9):
+    """
+    compute_indicators for a whole universe at once.
+    Every rolling/ewm pass runs once over the full time x ticker float block, with no per-ticker loop,
+    and returns a frame with (field, ticker) columns. Values equal compute_indicators on each ticker's
+    own frame as long as a ticker's bars are contiguous in the panel (leading/trailing NaN are fine).
+    """
+    close = close_matrix(prices).astype(float)
+    if close.empty:
+        return pd.DataFrame(columns=pd.MultiIndex.from_tuples([], names=['Field', 'Ticker']))
+
+    out = {'Close': close}
+    out['SMA'] = close.rolling(window=int(sma)).mean()
+    out['EMA'] = close.ewm(span=int(ema), adjust=False).mean()
+
+    delta = close.diff()
+    # bars before a ticker lists have no close; zero-filling them would leak flat bars into its first
+    # RSI windows (its first listed bar keeps compute_indicators' zero change)
+    listed = close.notna()
+    gain = delta.where(delta > 0, 0.0).where(listed).rolling(int(rsi)).mean()
+    loss = -delta.where(delta < 0, 0.0).where(listed).rolling(int(rsi)).mean()
+    rs = gain / loss.replace(0, np.nan)
+    out['RSI'] = 100 - (100 / (1 + rs))
+
+    ema_fast = close.ewm(span=int(macd_fast), adjust=False).mean()
+    ema_slow = close.ewm(span=int(macd_slow), adjust=False).mean()
+    out['MACD'] = ema_fast - ema_slow
+    out['MACD_signal'] = out['MACD'].ewm(span=int(macd_signal), adjust=False).mean()
+    out['MACD_hist'] = out['MACD'] - out['MACD_signal']
+    return pd.concat(out, axis=1, names=['Field', 'Ticker'])
@@ -0,0 +1,25 @@
+import importlib
+import sys
+
+# UI label -> module implementing it. Nothing is imported until a backend is first requested,
+# so TensorFlow, PyTorch and scikit-learn stay out of processes that never use them.
+BACKENDS = {
+    "LSTM": "ml_models.lstm_model",
+    "Transformer": "ml_models.transformer_model",
+    "Linear Regression": "ml_models.baseline_models",
+    "Random Forest": "ml_models.baseline_models",
+    # one model trained on every loaded ticker at once
+    "Global LSTM": "ml_models.global_model",
+    "Global Transformer": "ml_models.global_model",
+}
+
+
+def get_backend(name):
+    """Import (once) and return the module behind a backend label."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown model backend: {name}")
+    return importlib.import_module(BACKENDS[name])
+
+
+def loaded_backends():
+    return [name for name, module in BACKENDS.items() if module in sys.modules]
@@ -1,7 +1,9 @@
 import numpy as np
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
+from utils.instrumentation import instrument
 
+@instrument()
 def train_linear_regression(data, feature="Close"):
     X = np.arange(len(data)).reshape(-1, 1)
     y = data[feature].values
@@ -9,9 +11,10 @@ def train_linear_regression(data, feature="Close"):
     preds = model.predict(X)
     return model, preds
 
-def train_random_forest(data, feature="Close"):
+@instrument()
+def train_random_forest(data, feature="Close", n_jobs=-1):
     X = np.arange(len(data)).reshape(-1, 1)
     y = data[feature].values
-    model = RandomForestRegressor(n_estimators=100, random_state=42).fit(X, y)
+    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs).fit(X, y)
     preds = model.predict(X)
     return model, preds
@@ -0,0 +1,96 @@
+import sys
+import weakref
+
+import numpy as np
+import pandas as pd
+from utils.instrumentation import instrument
+
+_compiled = weakref.WeakKeyDictionary()
+
+
+def _is_torch(model):
+    torch = sys.modules.get("torch")
+    return torch is not None and isinstance(model, torch.nn.Module)
+
+
+def _keras_rollout(model, seqs, days):
+    """Autoregressive rollout inside one tf.function graph; one trace per model, reused for any batch size."""
+    fn = _compiled.get(model)
+    if fn is None:
+        import tensorflow as tf
+
+        @tf.function(reduce_retracing=True)
+        def fn(seq, steps):
+            out = tf.TensorArray(tf.float32, size=steps)
+            for i in tf.range(steps):
+                pred = tf.cast(model(seq, training=False), tf.float32)
+                out = out.write(i, pred[:, 0])
+                seq = tf.concat([seq[:, 1:, :], tf.expand_dims(pred, 1)], axis=1)
+            return tf.transpose(out.stack())
+
+        _compiled[model] = fn
+    import tensorflow as tf
+    return fn(tf.constant(seqs, dtype=tf.float32), tf.constant(days, dtype=tf.int32)).numpy()
+
+
+def _torch_rollout(model, seqs, days, ticker_ids=None):
+    """Autoregressive rollout over a preallocated (batch, lookback + days) buffer under inference_mode."""
+    import torch
+    model.eval()
+    batch, lookback, n_features = seqs.shape
+    buf = torch.empty((batch, lookback + days, n_features), dtype=torch.float32)
+    buf[:, :lookback] = torch.from_numpy(np.ascontiguousarray(seqs, dtype=np.float32))
+    ids = None if ticker_ids is None else torch.as_tensor(ticker_ids, dtype=torch.long)
+    with torch.inference_mode():
+        for i in range(days):
+            window = buf[:, i:i + lookback]
+            pred = model(window) if ids is None else model(window, ids)
+            buf[:, lookback + i, 0] = pred[:, 0]
+    return buf[:, lookback:, 0].numpy().copy()
+
+
+def rollout(model, seqs, days, ticker_ids=None):
+    """Scaled (batch, lookback, 1) windows -> scaled (batch, days) forecasts, for Keras or PyTorch models."""
+    seqs = np.asarray(seqs, dtype=np.float32)
+    if seqs.ndim != 3 or seqs.shape[2] != 1:
+        raise ValueError("autoregressive forecasting needs univariate (batch, lookback, 1) windows")
+    if days <= 0 or len(seqs) == 0:
+        return np.empty((len(seqs), 0), dtype=np.float32)
+    if _is_torch(model):
+        return _torch_rollout(model, seqs, int(days), ticker_ids)
+    if ticker_ids is not None:
+        raise ValueError("ticker ids are only supported for PyTorch models")
+    return _keras_rollout(model, seqs, int(days))
+
+
+@instrument(rows_arg="histories")
+def forecast(model, histories, scalers, lookback=60, days=7, feature="Close", ticker_ids=None):
+    """
+    Forecast `days` steps for many tickers in one batched rollout.
+
+    histories maps ticker -> price Series or frame with `feature`; scalers is either one fitted
+    MinMaxScaler shared by all tickers or a ticker -> scaler dict. Returns a frame with one row
+    per ticker and columns 1..days in price units.
+    """
+    tickers, windows, mins, scales = [], [], [], []
+    for ticker, history in histories.items():
+        values = history[feature] if isinstance(history, pd.DataFrame) else history
+        values = np.asarray(values, dtype=float)[-lookback:]
+        if len(values) < lookback:
+            continue
+        scaler = scalers[ticker] if isinstance(scalers, dict) else scalers
+        if getattr(scaler, "n_features_in_", 1) != 1:
+            raise ValueError("autoregressive forecasting needs a model trained on the target column only")
+        tickers.append(ticker)
+        windows.append(scaler.transform(values.reshape(-1, 1)))
+        mins.append(scaler.min_[0])
+        scales.append(scaler.scale_[0])
+    if not tickers:
+        return pd.DataFrame(columns=range(1, days + 1))
+
+    ids = None
+    if ticker_ids is not None:
+        ids = np.asarray([ticker_ids[t] for t in tickers])
+    scaled = rollout(model, np.stack(windows).astype(np.float32), days, ticker_ids=ids)
+    prices = (scaled - np.asarray(mins)[:, None]) / np.asarray(scales)[:, None]
+    return pd.DataFrame(prices, index=pd.Index(tickers, name="Ticker"), columns=range(1, days + 1))
@@ -0,0 +1,149 @@
+import os
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import BatchSampler, DataLoader, Dataset, RandomSampler
+from ml_models.forecast import forecast as _forecast
+from ml_models.windowing import scale_columns, inverse_target, batch_indices
+from utils.instrumentation import instrument
+
+ARCHS = ("lstm", "transformer")
+
+class GlobalPredictor(nn.Module):
+    """
+    One next-step predictor for a whole universe. With embed_dim > 0 every input step also carries a
+    learned embedding of the ticker (id 0 is reserved for tickers outside the training universe).
+    """
+
+    def __init__(self, arch="lstm", n_tickers=0, embed_dim=8, hidden_dim=64, num_layers=2, nhead=4):
+        super().__init__()
+        if arch not in ARCHS:
+            raise ValueError(f"Unknown architecture: {arch}")
+        self.embedding = nn.Embedding(n_tickers + 1, embed_dim, padding_idx=0) if embed_dim and n_tickers else None
+        self.input_layer = nn.Linear(1 + (embed_dim if self.embedding is not None else 0), hidden_dim)
+        if arch == "lstm":
+            self.encoder = nn.LSTM(hidden_dim, hidden_dim, num_layers=num_layers, batch_first=True)
+        else:
+            # torch's default feed-forward width (2048) dominates memory at large batch sizes
+            layer = nn.TransformerEncoderLayer(d_model=hidden_dim, nhead=nhead, dim_feedforward=4 * hidden_dim,
+                                               batch_first=True)
+            self.encoder = nn.TransformerEncoder(layer, num_layers=num_layers)
+        self.fc_out = nn.Linear(hidden_dim, 1)
+
+    def forward(self, src, ticker_ids=None):
+        # src: (batch, lookback, 1), ticker_ids: (batch,) -> next-step prediction from the last position
+        if self.embedding is not None:
+            if ticker_ids is None:
+                ticker_ids = torch.zeros(len(src), dtype=torch.long)
+            emb = self.embedding(ticker_ids)[:, None, :].expand(-1, src.shape[1], -1)
+            src = torch.cat([src, emb], dim=-1)
+        x = self.encoder(self.input_layer(src))
+        if isinstance(x, tuple):
+            x = x[0]
+        return self.fc_out(x[:, -1, :])
+
+class PooledWindows(Dataset):
+    """
+    Next-step windows of many scaled series stored end to end in one float32 array. Items are whole
+    mini-batches (window indices in, stacked tensors out), so each DataLoader worker builds a batch
+    with one fancy-index gather instead of collating windows one by one.
+    """
+
+    def __init__(self, values, starts, ids, lookback):
+        self.values, self.starts, self.ids, self.lookback = values, starts, ids, lookback
+        self.offsets = np.arange(lookback)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, batch):
+        starts = self.starts[batch]
+        X = self.values[starts[:, None] + self.offsets][:, :, None]
+        y = self.values[starts + self.lookback][:, None]
+        return torch.from_numpy(X), torch.from_numpy(y), torch.from_numpy(self.ids[batch])
+
+def pool_windows(frames, lookback, ticker_ids, feature="Close"):
+    """
+    Scale each ticker's `feature` with its own MinMaxScaler and pool the series.
+    Returns (dataset, scalers, spans) where spans maps ticker -> slice of its windows.
+    """
+    scalers = {}
+    parts, starts, ids, spans = [], [], [], {}
+    offset = n_windows = 0
+    for ticker, df in frames.items():
+        if ticker not in ticker_ids or len(df) <= lookback:
+            continue
+        scaled, scalers[ticker] = scale_columns(df, [feature])
+        n = len(scaled) - lookback
+        parts.append(scaled[:, 0])
+        starts.append(offset + np.arange(n))
+        ids.append(np.full(n, ticker_ids[ticker], dtype=np.int64))
+        spans[ticker] = slice(n_windows, n_windows + n)
+        offset += len(scaled)
+        n_windows += n
+    if not parts:
+        raise ValueError(f"No ticker has more than lookback={lookback} bars")
+    dataset = PooledWindows(np.concatenate(parts), np.concatenate(starts), np.concatenate(ids), lookback)
+    return dataset, scalers, spans
+
+def _predict_scaled(model, dataset, batch_size):
+    model.eval()
+    out = np.empty(len(dataset), dtype=np.float32)
+    with torch.inference_mode():
+        for batch in batch_indices(len(dataset), batch_size):
+            X, _, ids = dataset[batch]
+            out[batch] = model(X, ids)[:, 0].numpy()
+    return out
+
+@instrument(rows_arg="frames")
+def train_global(frames, arch="lstm", feature="Close", lookback=60, epochs=5, lr=0.001, batch_size=1024, embed_dim=8,
+                 hidden_dim=64, num_workers=2, threads=None, seed=0, predict=True):
+    """
+    Train one model on the windows of every ticker in `frames` ({ticker: frame}) together.
+
+    Each ticker is scaled on its own, so price levels do not matter; embed_dim=0 drops the ticker
+    embedding. Mini-batches are gathered by `num_workers` DataLoader processes while `threads`
+    (default: torch's) run the model. Returns (model, preds, scalers, ticker_ids): preds maps ticker ->
+    in-sample predictions in price units (None with predict=False), aligned with the last bars.
+    """
+    if threads:
+        torch.set_num_threads(int(threads))
+    torch.manual_seed(seed)
+    ticker_ids = {t: i + 1 for i, t in enumerate(t for t, df in frames.items() if len(df) > lookback)}
+    dataset, scalers, spans = pool_windows(frames, lookback, ticker_ids, feature=feature)
+
+    model = GlobalPredictor(arch, n_tickers=len(ticker_ids), embed_dim=embed_dim, hidden_dim=hidden_dim)
+    criterion = nn.MSELoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    sampler = BatchSampler(RandomSampler(dataset, generator=torch.Generator().manual_seed(seed)), batch_size,
+                           drop_last=False)
+    num_workers = min(int(num_workers), os.cpu_count() or 1)
+    loader = DataLoader(dataset, sampler=sampler, batch_size=None, num_workers=num_workers,
+                        persistent_workers=num_workers > 0)
+    for epoch in range(epochs):
+        model.train()
+        for X, y, ids in loader:
+            optimizer.zero_grad()
+            loss = criterion(model(X, ids), y)
+            loss.backward()
+            optimizer.step()
+
+    if not predict:
+        return model, None, scalers, ticker_ids
+    scaled = _predict_scaled(model, dataset, max(batch_size, 4096))
+    preds = {t: inverse_target(scalers[t], scaled[span]) for t, span in spans.items()}
+    return model, preds, scalers, ticker_ids
+
+def forecast_global(model, histories, scalers, ticker_ids, lookback=60, days=7, feature="Close"):
+    """
+    Forecast `days` steps for every ticker in `histories` in one batched rollout. Tickers the model
+    was not trained on are scaled on their own history and forecast without an embedding.
+    """
+    scalers, ids = dict(scalers), {}
+    for ticker, history in histories.items():
+        if ticker not in scalers:
+            frame = history.to_frame(feature) if hasattr(history, "to_frame") else history
+            _, scalers[ticker] = scale_columns(frame, [feature])
+        ids[ticker] = ticker_ids.get(ticker, 0)
+    return _forecast(model, histories, scalers, lookback=lookback, days=days, feature=feature, ticker_ids=ids)
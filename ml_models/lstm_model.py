@@ -1,22 +1,38 @@
+import math
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.models import Sequential
+from tensorflow.keras.models import Sequential, load_model as _load_keras_model
 from tensorflow.keras.layers import LSTM, Dense, Dropout
+from tensorflow.keras.utils import Sequence
+from ml_models.forecast import forecast as _forecast
+from ml_models.windowing import feature_columns, trim_warmup, scale_columns, inverse_target, make_windows
+from utils.instrumentation import instrument
 
-def train_lstm(data, feature="Close", lookback=60, epochs=5, batch_size=32):
-    values = data[feature].values.reshape(-1, 1)
-    scaler = MinMaxScaler()
-    scaled = scaler.fit_transform(values)
+MODEL_FILE = "model.keras"
 
-    X, y = [], []
-    for i in range(lookback, len(scaled)):
-        X.append(scaled[i-lookback:i, 0])
-        y.append(scaled[i, 0])
-    X, y = np.array(X), np.array(y)
-    X = np.reshape(X, (X.shape[0], X.shape[1], 1))
+class WindowSequence(Sequence):
+    """Keras feed that slices mini-batches out of zero-copy windows on demand."""
 
+    def __init__(self, X, y=None, batch_size=32, shuffle=False, seed=None):
+        super().__init__()
+        self.X, self.y, self.batch_size, self.shuffle = X, y, batch_size, shuffle
+        self.rng = np.random.default_rng(seed)
+        self.order = self.rng.permutation(len(X)) if shuffle else np.arange(len(X))
+
+    def __len__(self):
+        return math.ceil(len(self.X) / self.batch_size)
+
+    def __getitem__(self, i):
+        idx = self.order[i * self.batch_size:(i + 1) * self.batch_size]
+        xb = np.ascontiguousarray(self.X[idx])
+        return (xb, np.ascontiguousarray(self.y[idx])) if self.y is not None else xb
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.order = self.rng.permutation(len(self.X))
+
+def build_lstm(lookback, n_features=1):
     model = Sequential([
-        LSTM(50, return_sequences=True, input_shape=(X.shape[1], 1)),
+        LSTM(50, return_sequences=True, input_shape=(lookback, n_features)),
         Dropout(0.2),
         LSTM(50, return_sequences=False),
         Dropout(0.2),
@@ -24,28 +40,57 @@ def train_lstm(data, feature="Close", lookback=60, epochs=5, batch_size=32):
         Dense(1)
     ])
     model.compile(optimizer='adam', loss='mean_squared_error')
-    model.fit(X, y, epochs=epochs, batch_size=batch_size, verbose=0)
+    return model
 
-    preds = model.predict(X, verbose=0)
-    preds = scaler.inverse_transform(preds)
+def predict_windows(model, X, batch_size=256):
+    return model.predict(WindowSequence(X, batch_size=batch_size), verbose=0)
 
-    return model, preds.flatten(), scaler
+@instrument()
+def train_lstm(data, feature="Close", lookback=60, epochs=5, batch_size=32, features=None):
+    columns = feature_columns(feature, features)
+    scaled, scaler = scale_columns(trim_warmup(data, columns), columns)
+    X, y = make_windows(scaled, lookback)
 
+    model = build_lstm(lookback, X.shape[2])
+    model.fit(WindowSequence(X, y, batch_size=batch_size, shuffle=True), epochs=epochs, verbose=0)
 
-def predict_future_lstm(model, data, scaler, lookback=60, days=7):
+    preds = model.predict(WindowSequence(X, batch_size=max(batch_size, 256)), verbose=0)
+    preds = inverse_target(scaler, preds)
+
+    return model, preds, scaler
+
+@instrument(rows_arg="new_rows")
+def fine_tune_lstm(model, scaler, data, new_rows, feature="Close", lookback=60, epochs=1, batch_size=32, features=None,
+                   predict=True):
     """
-    Predict future stock prices for 'days' ahead using trained LSTM.
+    Continue training an already fitted model on the windows whose targets are the last `new_rows` bars,
+    keeping the original scaler, and return fresh in-sample predictions (None with predict=False).
+    new_rows=0 only predicts.
     """
-    last_data = data[-lookback:].values.reshape(-1, 1)
-    scaled_last = scaler.transform(last_data)
+    columns = feature_columns(feature, features)
+    scaled, _ = scale_columns(trim_warmup(data, columns), columns, scaler=scaler)
+    X, y = make_windows(scaled, lookback)
+    new = min(len(X), max(0, int(new_rows)))
+    if new and epochs:
+        model.fit(WindowSequence(X[-new:], y[-new:], batch_size=batch_size, shuffle=True), epochs=epochs, verbose=0)
+
+    if not predict:
+        return model, None, scaler
+    preds = predict_windows(model, X, batch_size=max(batch_size, 256))
+    return model, inverse_target(scaler, preds), scaler
 
-    seq = scaled_last.reshape(1, lookback, 1)
-    predictions = []
+def save_model(model, path):
+    model.save(str(path))
 
-    for _ in range(days):
-        pred = model.predict(seq, verbose=0)[0][0]
-        predictions.append(pred)
-        seq = np.append(seq[:, 1:, :], [[[pred]]], axis=1)
+def load_model(path):
+    return _load_keras_model(str(path))
 
-    predictions = scaler.inverse_transform(np.array(predictions).reshape(-1, 1))
-    return predictions.flatten()
+
+def predict_future_lstm(model, data, scaler, lookback=60, days=7):
+    """
+    Predict future stock prices for 'days' ahead using trained LSTM.
+    The whole rollout runs in one compiled graph; see ml_models.forecast for many tickers at once.
+    """
+    if len(data) < lookback:
+        raise ValueError(f"Need at least lookback={lookback} bars to forecast, got {len(data)}")
+    return _forecast(model, {"_": data}, scaler, lookback=lookback, days=days).iloc[0].to_numpy()
@@ -0,0 +1,286 @@
+import hashlib
+import importlib
+import inspect
+import json
+import pickle
+import shutil
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from config.settings import MODEL_REGISTRY_DIR, MODEL_REGISTRY_MAX_BYTES
+from ml_models.windowing import feature_columns, trim_warmup
+from utils.instrumentation import instrument, record_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: entries are not locked across processes
+    fcntl = None
+
+# kind -> (module, full trainer, warm-start trainer); modules are imported on first use
+BACKENDS = {
+    "lstm": ("ml_models.lstm_model", "train_lstm", "fine_tune_lstm"),
+    "transformer": ("ml_models.transformer_model", "train_transformer", "fine_tune_transformer"),
+}
+MEMORY_SLOTS = 16
+
+_memory = OrderedDict()
+
+
+def _backend(kind):
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown model kind: {kind}")
+    module, train, fine_tune = BACKENDS[kind]
+    module = importlib.import_module(module)
+    return module, getattr(module, train), getattr(module, fine_tune)
+
+
+def _hparams(train, hparams):
+    """The trainer's defaults overridden by hparams, so equivalent calls share one registry key."""
+    resolved = {name: p.default for name, p in inspect.signature(train).parameters.items()
+                if p.default is not inspect.Parameter.empty and name not in ("feature", "features")}
+    resolved.update(hparams)
+    return resolved
+
+
+def _fingerprint(data, columns, n_rows):
+    digest = hashlib.sha1()
+    digest.update(np.asarray(data.index[:n_rows].astype("int64")).tobytes())
+    digest.update(np.ascontiguousarray(data[columns].to_numpy(dtype=float)[:n_rows]).tobytes())
+    return digest.hexdigest()
+
+
+def _stamps(index):
+    return np.asarray(index.as_unit("ns").asi8 if hasattr(index, "as_unit") else index.astype("int64"))
+
+
+def _bars(data, feature):
+    """What an entry remembers of its training data: bar timestamps and target values."""
+    return _stamps(data.index), data[feature].to_numpy(dtype=float)
+
+
+def _new_rows(entry, data, feature, columns):
+    """
+    How many trailing bars of `data` a stored entry has not seen, or None when it cannot be warm-started.
+    The stored bars must contain data's first timestamp, every overlapping bar except the stored last one
+    (which may have been revised) must have the same timestamp and price, data must reach the stored last
+    bar, and no value may fall outside the range the stored scaler was fitted on.
+    """
+    stamps, values = entry["bars"]
+    new_stamps = _stamps(data.index)
+    if not len(stamps) or not len(new_stamps) or not stamps[0] <= new_stamps[0] <= stamps[-1] \
+            or new_stamps[-1] < stamps[-1]:
+        return None
+    start = int(np.searchsorted(stamps, new_stamps[0]))
+    settled = len(stamps) - 1 - start
+    if stamps[start] != new_stamps[0] or len(new_stamps) <= settled \
+            or not np.array_equal(stamps[start:-1], new_stamps[:settled]) \
+            or not np.array_equal(values[start:-1], data[feature].to_numpy(dtype=float)[:settled], equal_nan=True):
+        return None
+    scaler = entry["scaler"]
+    trimmed = trim_warmup(data, columns)[columns].to_numpy(dtype=float)
+    if not len(trimmed) or (np.nanmin(trimmed, axis=0) < scaler.data_min_).any() \
+            or (np.nanmax(trimmed, axis=0) > scaler.data_max_).any():
+        return None
+    return len(new_stamps) - settled
+
+
+def _entry_dir(key):
+    return Path(MODEL_REGISTRY_DIR) / key
+
+
+@contextmanager
+def _locked(key, blocking=True):
+    """
+    Exclusive lock on one entry shared by every process using the registry (app sessions, batch runner
+    workers); yields False when blocking=False and another process holds it.
+    """
+    root = Path(MODEL_REGISTRY_DIR)
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / f"{key}.lock", "a") as fh:
+        acquired = True
+        if fcntl is not None:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                acquired = False
+        yield acquired
+
+
+def _read_meta(path):
+    with open(path / "meta.json") as fh:
+        return json.load(fh)
+
+
+def _dir_bytes(path):
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def _write_meta(path, meta):
+    tmp = path / "meta.json.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(meta, fh)
+    tmp.replace(path / "meta.json")
+
+
+def _remember(key, entry):
+    _memory[key] = entry
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_SLOTS:
+        _memory.popitem(last=False)
+
+
+def _load(key, module, n_features):
+    path = _entry_dir(key)
+    if not (path / "meta.json").exists():
+        _memory.pop(key, None)
+        return None
+    if key in _memory:
+        # another process may have retrained or fine-tuned the entry since it was cached here
+        try:
+            current = _read_meta(path).get("trained") == _memory[key]["meta"].get("trained")
+        except Exception:
+            current = False
+        if current:
+            _memory.move_to_end(key)
+            return _memory[key]
+        del _memory[key]
+    try:
+        meta = _read_meta(path)
+        with open(path / "scaler.pkl", "rb") as fh:
+            scaler = pickle.load(fh)
+        # a saved Keras model carries its input shape; a PyTorch state dict needs the width to rebuild it
+        if "n_features" in inspect.signature(module.load_model).parameters:
+            model = module.load_model(path / module.MODEL_FILE, n_features=n_features)
+        else:
+            model = module.load_model(path / module.MODEL_FILE)
+        preds = np.load(path / "preds.npy")
+        with np.load(path / "bars.npz") as bars:
+            bars = (bars["stamps"], bars["values"])
+    except Exception:
+        # unreadable entries are dropped and retrained
+        shutil.rmtree(path, ignore_errors=True)
+        return None
+    entry = {"model": model, "scaler": scaler, "preds": preds, "bars": bars, "meta": meta}
+    _remember(key, entry)
+    return entry
+
+
+def _save(key, module, entry):
+    path = _entry_dir(key)
+    path.mkdir(parents=True, exist_ok=True)
+    # without meta.json a half-written entry reads as missing, so a crash below only costs a retrain
+    (path / "meta.json").unlink(missing_ok=True)
+    entry["meta"]["trained"] = time.time()
+    module.save_model(entry["model"], path / module.MODEL_FILE)
+    with open(path / "scaler.pkl", "wb") as fh:
+        pickle.dump(entry["scaler"], fh)
+    np.save(path / "preds.npy", np.asarray(entry["preds"]))
+    np.savez(path / "bars.npz", stamps=entry["bars"][0], values=entry["bars"][1])
+    entry["meta"]["bytes"] = _dir_bytes(path)
+    _write_meta(path, entry["meta"])
+    _remember(key, entry)
+    evict(keep=key)
+
+
+def _touch(key, entry):
+    entry["meta"]["last_used"] = time.time()
+    path = _entry_dir(key)
+    if path.exists():
+        _write_meta(path, entry["meta"])
+
+
+@instrument("registry.get_or_train", rows_arg="data")
+def get_or_train(kind, data, ticker, interval, feature="Close", features=None, fine_tune_epochs=1, **hparams):
+    """
+    Return (model, preds, scaler) for a ticker, reusing a stored model whenever possible.
+
+    Entries are keyed by kind, ticker, interval, feature columns and resolved hyperparameters, and
+    remember the bars they were trained on. Identical data returns the cached model and predictions;
+    data that overlaps the stored bars exactly (same timestamps and prices, except for a revised last
+    bar), ends no earlier and stays inside the scaler's range warm-starts the model for
+    `fine_tune_epochs` on the new windows, even if its window start moved forward; anything else is
+    a full refit.
+    """
+    module, train, fine_tune = _backend(kind)
+    columns = feature_columns(feature, features)
+    hparams = _hparams(train, hparams)
+    spec = {"kind": kind, "ticker": ticker, "interval": interval, "features": columns, "hparams": hparams}
+    key = hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+    n_rows = len(data)
+    # one process at a time trains or updates an entry; the others then reuse its result
+    with _locked(key):
+        entry = _load(key, module, len(columns))
+        if entry is not None:
+            meta = entry["meta"]
+            if n_rows == meta["n_rows"] and _fingerprint(data, columns, n_rows) == meta["data_fingerprint"]:
+                _touch(key, entry)
+                record_cache("model_registry", True, ticker)
+                return entry["model"], entry["preds"], entry["scaler"]
+            new_rows = _new_rows(entry, data, feature, columns)
+            if new_rows is not None:
+                tune_params = {k: v for k, v in hparams.items() if k != "epochs"}
+                model, preds, scaler = fine_tune(entry["model"], entry["scaler"], data, new_rows, feature=feature,
+                                                 features=features, epochs=fine_tune_epochs, **tune_params)
+                entry = {"model": model, "scaler": scaler, "preds": preds, "bars": _bars(data, feature),
+                         "meta": dict(meta)}
+                entry["meta"].update(n_rows=n_rows, last_used=time.time(), fine_tunes=meta.get("fine_tunes", 0) + 1,
+                                     data_fingerprint=_fingerprint(data, columns, n_rows))
+                _save(key, module, entry)
+                record_cache("model_registry", "fine_tune", ticker)
+                return model, preds, scaler
+
+        record_cache("model_registry", False, ticker)
+        model, preds, scaler = train(data, feature=feature, features=features, **hparams)
+        now = time.time()
+        meta = dict(spec, key=key, n_rows=n_rows, created=now, last_used=now, fine_tunes=0,
+                    data_fingerprint=_fingerprint(data, columns, n_rows))
+        _save(key, module, {"model": model, "scaler": scaler, "preds": preds, "bars": _bars(data, feature),
+                            "meta": meta})
+        return model, preds, scaler
+
+
+def list_entries():
+    """Metadata of every stored model, most recently used first."""
+    root = Path(MODEL_REGISTRY_DIR)
+    entries = []
+    for meta_path in root.glob("*/meta.json") if root.exists() else []:
+        try:
+            with open(meta_path) as fh:
+                entries.append(json.load(fh))
+        except Exception:
+            continue
+    return sorted(entries, key=lambda m: m.get("last_used", 0), reverse=True)
+
+
+def purge(ticker=None, kind=None, key=None):
+    """Delete matching entries (all of them when no filter is given); returns how many were removed."""
+    removed = 0
+    for meta in list_entries():
+        if (ticker is None or meta.get("ticker") == ticker) and (kind is None or meta.get("kind") == kind) \
+                and (key is None or meta.get("key") == key):
+            with _locked(meta["key"]):
+                shutil.rmtree(_entry_dir(meta["key"]), ignore_errors=True)
+            _memory.pop(meta["key"], None)
+            removed += 1
+    return removed
+
+
+def evict(max_bytes=MODEL_REGISTRY_MAX_BYTES, keep=None):
+    """Drop least recently used entries until the registry fits in max_bytes, skipping entries in use elsewhere."""
+    entries = list_entries()
+    total = sum(m.get("bytes", 0) for m in entries)
+    for meta in reversed(entries):
+        if total <= max_bytes:
+            break
+        if meta.get("key") == keep:
+            continue
+        with _locked(meta["key"], blocking=False) as acquired:
+            if not acquired:
+                continue
+            shutil.rmtree(_entry_dir(meta["key"]), ignore_errors=True)
+        _memory.pop(meta["key"], None)
+        total -= meta.get("bytes", 0)
@@ -1,48 +1,95 @@
 import torch
 import torch.nn as nn
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
+from ml_models.forecast import forecast as _forecast
+from ml_models.windowing import feature_columns, trim_warmup, scale_columns, inverse_target, make_windows, iter_batches
+from utils.instrumentation import instrument
+
+MODEL_FILE = "model.pt"
 
 class TransformerPredictor(nn.Module):
     def __init__(self, feature_size=1, num_layers=2, nhead=2, hidden_dim=64):
         super().__init__()
         self.input_layer = nn.Linear(feature_size, hidden_dim)
-        encoder_layer = nn.TransformerEncoderLayer(d_model=hidden_dim, nhead=nhead)
+        encoder_layer = nn.TransformerEncoderLayer(d_model=hidden_dim, nhead=nhead, batch_first=True)
         self.transformer = nn.TransformerEncoder(encoder_layer, num_layers=num_layers)
         self.fc_out = nn.Linear(hidden_dim, 1)
 
     def forward(self, src):
+        # src: (batch, lookback, features) -> next-step prediction from the last position
         x = self.input_layer(src)
         x = self.transformer(x)
-        return self.fc_out(x)
-
-def train_transformer(data, feature="Close", lookback=60, epochs=5, lr=0.001):
-    values = data[feature].values.reshape(-1, 1)
-    scaler = MinMaxScaler()
-    scaled = scaler.fit_transform(values)
+        return self.fc_out(x[:, -1, :])
 
-    X, y = [], []
-    for i in range(lookback, len(scaled)):
-        X.append(scaled[i-lookback:i, 0])
-        y.append(scaled[i, 0])
-    X, y = np.array(X), np.array(y)
+def predict_windows(model, X, batch_size=512):
+    model.eval()
+    with torch.no_grad():
+        preds = [model(torch.from_numpy(xb)).numpy() for xb in iter_batches(X, batch_size=batch_size)]
+    return np.concatenate(preds) if preds else np.empty((0, 1), dtype=np.float32)
 
-    X_tensor = torch.tensor(X, dtype=torch.float32).unsqueeze(-1)
-    y_tensor = torch.tensor(y, dtype=torch.float32).unsqueeze(-1)
+@instrument()
+def train_transformer(data, feature="Close", lookback=60, epochs=5, lr=0.001, batch_size=64, features=None):
+    columns = feature_columns(feature, features)
+    scaled, scaler = scale_columns(trim_warmup(data, columns), columns)
+    X, y = make_windows(scaled, lookback)
 
-    model = TransformerPredictor()
+    model = TransformerPredictor(feature_size=X.shape[2])
     criterion = nn.MSELoss()
     optimizer = torch.optim.Adam(model.parameters(), lr=lr)
 
     for epoch in range(epochs):
-        optimizer.zero_grad()
-        output = model(X_tensor)
-        loss = criterion(output, y_tensor)
-        loss.backward()
-        optimizer.step()
+        model.train()
+        for xb, yb in iter_batches(X, y, batch_size=batch_size, shuffle=True, seed=epoch):
+            optimizer.zero_grad()
+            output = model(torch.from_numpy(xb))
+            loss = criterion(output, torch.from_numpy(yb).unsqueeze(-1))
+            loss.backward()
+            optimizer.step()
 
-    with torch.no_grad():
-        preds = model(X_tensor).numpy()
+    preds = inverse_target(scaler, predict_windows(model, X))
+    return model, preds, scaler
+
+def predict_future_transformer(model, data, scaler, lookback=60, days=7):
+    """
+    Predict future prices for 'days' ahead with a trained univariate Transformer.
+    """
+    if len(data) < lookback:
+        raise ValueError(f"Need at least lookback={lookback} bars to forecast, got {len(data)}")
+    return _forecast(model, {"_": data}, scaler, lookback=lookback, days=days).iloc[0].to_numpy()
+
+@instrument(rows_arg="new_rows")
+def fine_tune_transformer(model, scaler, data, new_rows, feature="Close", lookback=60, epochs=1, lr=0.001,
+                          batch_size=64, features=None, predict=True):
+    """
+    Continue training an already fitted model on the windows whose targets are the last `new_rows` bars,
+    keeping the original scaler, and return fresh in-sample predictions (None with predict=False).
+    new_rows=0 only predicts.
+    """
+    columns = feature_columns(feature, features)
+    scaled, _ = scale_columns(trim_warmup(data, columns), columns, scaler=scaler)
+    X, y = make_windows(scaled, lookback)
+    new = min(len(X), max(0, int(new_rows)))
+    if new and epochs:
+        criterion = nn.MSELoss()
+        optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+        for epoch in range(epochs):
+            model.train()
+            for xb, yb in iter_batches(X[-new:], y[-new:], batch_size=batch_size, shuffle=True, seed=epoch):
+                optimizer.zero_grad()
+                loss = criterion(model(torch.from_numpy(xb)), torch.from_numpy(yb).unsqueeze(-1))
+                loss.backward()
+                optimizer.step()
+
+    if not predict:
+        return model, None, scaler
+    preds = inverse_target(scaler, predict_windows(model, X))
+    return model, preds, scaler
+
+def save_model(model, path):
+    torch.save(model.state_dict(), path)
 
-    preds = scaler.inverse_transform(preds)
-    return model, preds.flatten(), scaler
+def load_model(path, n_features=1):
+    model = TransformerPredictor(feature_size=n_features)
+    model.load_state_dict(torch.load(path, map_location="cpu"))
+    model.eval()
+    return model
@@ -0,0 +1,213 @@
+"""
+Walk-forward (expanding window) out-of-sample evaluation of the forecasting backends over a ticker universe.
+
+Each fold trains on rows [0, train_end) and scores predictions for [train_end, test_end). Linear
+regression and random forest extrapolate their time-index fit over the whole test block, as the
+dashboard models do; LSTM and Transformer predict one step ahead from the actual preceding window.
+Tickers x models (and folds, for models refitted from scratch) run on a process pool. The series are
+written once to a memory-mapped .npy file that every worker opens read-only, so only offsets are pickled.
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from ml_models.windowing import feature_columns, trim_warmup, scale_columns, inverse_target, make_windows
+
+MODELS = ("linear", "random_forest", "lstm", "transformer")
+# deep model -> ml_models backend label; each backend provides train_<model> and fine_tune_<model>
+DEEP_MODELS = {"lstm": "LSTM", "transformer": "Transformer"}
+
+_arrays = {}
+
+
+def expanding_folds(n, n_folds=5, test_size=None, min_train=60):
+    """[(train_end, test_end), ...] for n rows; the last fold ends at n."""
+    test_size = int(test_size or n // (n_folds + 1))
+    first = n - n_folds * test_size
+    if test_size < 1 or first < min_train:
+        raise ValueError(f"{n} rows are too few for {n_folds} folds of {test_size} after {min_train} training rows")
+    return [(first + k * test_size, first + (k + 1) * test_size) for k in range(n_folds)]
+
+
+def _share(frames, columns, directory):
+    """Concatenate every ticker's columns into one float64 memmap; returns (path, {ticker: (start, stop)})."""
+    total = sum(len(df) for df in frames.values())
+    path = os.path.join(directory, "series.npy")
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(total, len(columns)))
+    offsets, pos = {}, 0
+    for ticker, df in frames.items():
+        out[pos:pos + len(df)] = df[columns].to_numpy(dtype=float)
+        offsets[ticker] = (pos, pos + len(df))
+        pos += len(df)
+    out.flush()
+    del out
+    return path, offsets
+
+
+def _open(path):
+    values = _arrays.get(path)
+    if values is None:
+        values = _arrays[path] = np.load(path, mmap_mode="r")
+    return values
+
+
+def _errors(actual, pred):
+    err = pred - actual
+    nonzero = actual != 0
+    return dict(mae=float(np.mean(np.abs(err))), rmse=float(np.sqrt(np.mean(err ** 2))),
+                mape=float(np.mean(np.abs(err[nonzero] / actual[nonzero])) * 100) if nonzero.any() else np.nan)
+
+
+def _baseline_folds(model, values, folds, params, warm):
+    from sklearn.linear_model import LinearRegression
+    from sklearn.ensemble import RandomForestRegressor
+
+    X, y = np.arange(len(values)).reshape(-1, 1), np.asarray(values[:, 0])
+    est, rows = None, []
+    for train_end, test_end in folds:
+        t0 = time.perf_counter()
+        continued = warm and est is not None
+        if model == "linear":
+            est = LinearRegression()
+        elif continued:
+            # warm_start keeps the trees grown on earlier folds and fits only the new ones on the larger window
+            est.n_estimators += params["trees_per_fold"]
+        else:
+            est = RandomForestRegressor(n_estimators=params["n_estimators"], random_state=42,
+                                        n_jobs=params["model_n_jobs"], warm_start=warm)
+        est.fit(X[:train_end], y[:train_end])
+        t1 = time.perf_counter()
+        pred = est.predict(X[train_end:test_end])
+        rows.append(dict(train_end=train_end, test_end=test_end, warm_start=continued,
+                         fit_seconds=t1 - t0, predict_seconds=time.perf_counter() - t1,
+                         **_errors(y[train_end:test_end], pred)))
+    return rows
+
+
+def _deep_folds(model, values, folds, params, warm, columns):
+    from ml_models import get_backend
+    module = get_backend(DEEP_MODELS[model])
+    train, fine_tune = getattr(module, f"train_{model}"), getattr(module, f"fine_tune_{model}")
+    if params["model_n_jobs"] == 1 and model == "transformer":
+        import torch
+        torch.set_num_threads(1)
+
+    lookback = params["lookback"]
+    frame = pd.DataFrame(np.asarray(values), columns=columns)
+    kwargs = dict(feature=columns[0], features=columns[1:], lookback=lookback)
+    est, scaler, prev_end, rows = None, None, 0, []
+    for train_end, test_end in folds:
+        t0 = time.perf_counter()
+        continued = warm and est is not None
+        if continued:
+            est, _, scaler = fine_tune(est, scaler, frame.iloc[:train_end], train_end - prev_end,
+                                       epochs=params["fine_tune_epochs"], predict=False, **kwargs)
+        else:
+            est, _, scaler = train(frame.iloc[:train_end], epochs=params["epochs"], **kwargs)
+        t1 = time.perf_counter()
+        scaled, _ = scale_columns(frame.iloc[:test_end], columns, scaler=scaler)
+        X, _ = make_windows(scaled, lookback)
+        pred = inverse_target(scaler, module.predict_windows(est, X[train_end - lookback:test_end - lookback]))
+        rows.append(dict(train_end=train_end, test_end=test_end, warm_start=continued,
+                         fit_seconds=t1 - t0, predict_seconds=time.perf_counter() - t1,
+                         **_errors(frame.iloc[train_end:test_end, 0].to_numpy(), pred)))
+        prev_end = train_end
+    return rows
+
+
+def _evaluate(path, start, stop, model, folds, params, warm, columns):
+    """Worker entry point: the given folds of one model on rows [start, stop) of the shared array."""
+    values = _open(path)[start:stop]
+    if model in DEEP_MODELS:
+        return _deep_folds(model, values, folds, params, warm, columns)
+    return _baseline_folds(model, values, folds, params, warm)
+
+
+def run_walk_forward(frames, models=MODELS, n_folds=5, test_size=None, min_train=None, feature="Close",
+                     features=None, warm_start=True, n_jobs=1, lookback=60, epochs=5, fine_tune_epochs=1,
+                     n_estimators=100, trees_per_fold=20, model_n_jobs=None):
+    """
+    Walk-forward evaluation of `models` on every {ticker: frame}; returns (folds, summary, timing).
+
+    folds has one row per ticker x model x fold with MAE, RMSE, MAPE (%) and fit/predict seconds;
+    summary averages the errors per model and totals their compute time; timing holds the wall and
+    summed compute seconds. warm_start continues the previous fold's random forest (adding
+    `trees_per_fold` trees) or network (`fine_tune_epochs` over the new bars) instead of refitting.
+    n_jobs processes share the work; model_n_jobs (forest threads) defaults to all cores only when n_jobs == 1.
+    A ticker/model that fails is reported in the `error` column rather than aborting the run.
+    """
+    t_start = time.perf_counter()
+    models = list(dict.fromkeys(models))
+    unknown = [m for m in models if m not in MODELS]
+    if unknown:
+        raise ValueError(f"Unknown models: {unknown}")
+    columns = feature_columns(feature, features)
+    # folds are row positions, so drop indicator warm-up rows once here rather than inside each fit
+    frames = {t: trim_warmup(df, columns) for t, df in frames.items()}
+    deep = any(m in DEEP_MODELS for m in models)
+    min_train = min_train or (lookback + 2 if deep else 20)
+    n_jobs = max(1, int(n_jobs))
+    params = dict(lookback=lookback, epochs=epochs, fine_tune_epochs=fine_tune_epochs, n_estimators=n_estimators,
+                  trees_per_fold=trees_per_fold, model_n_jobs=model_n_jobs or (-1 if n_jobs == 1 else 1))
+
+    fold_plan, failed = {}, []
+    for ticker, df in frames.items():
+        try:
+            fold_plan[ticker] = expanding_folds(len(df), n_folds, test_size, min_train)
+        except ValueError as exc:
+            failed += [dict(ticker=ticker, model=m, error=str(exc)) for m in models]
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="walk_forward_") as tmp:
+        path, offsets = _share({t: frames[t] for t in fold_plan}, columns, tmp)
+        tasks = []
+        for ticker, folds in fold_plan.items():
+            for model in models:
+                warm = warm_start and model != "linear"
+                # warm-started folds depend on each other; independent folds are separate tasks
+                for group in ([folds] if warm else [[f] for f in folds]):
+                    tasks.append(((ticker, model), (path, *offsets[ticker], model, group, params, warm, columns)))
+
+        if n_jobs == 1:
+            results = []
+            for _, args in tasks:
+                try:
+                    results.append(_evaluate(*args))
+                except Exception as exc:
+                    results.append(exc)
+            _arrays.pop(path, None)
+        else:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks) or 1)) as pool:
+                futures = [pool.submit(_evaluate, *args) for _, args in tasks]
+                results = []
+                for future in futures:
+                    try:
+                        results.append(future.result())
+                    except Exception as exc:
+                        results.append(exc)
+
+    for ((ticker, model), args), result in zip(tasks, results):
+        if isinstance(result, Exception):
+            failed.append(dict(ticker=ticker, model=model, error=repr(result)))
+            continue
+        index = frames[ticker].index
+        for rec in result:
+            fold = fold_plan[ticker].index((rec["train_end"], rec["test_end"]))
+            rows.append(dict(ticker=ticker, model=model, fold=fold, train_rows=rec["train_end"],
+                             test_rows=rec["test_end"] - rec["train_end"], test_start=index[rec["train_end"]],
+                             test_end=index[rec["test_end"] - 1], error=None,
+                             **{k: v for k, v in rec.items() if k not in ("train_end", "test_end")}))
+
+    folds = pd.DataFrame(rows + failed)
+    if not rows:
+        return folds, pd.DataFrame(), dict(wall_seconds=time.perf_counter() - t_start, compute_seconds=0.0)
+    folds = folds.sort_values(["ticker", "model", "fold"], na_position="last").reset_index(drop=True)
+    ok = folds[folds["error"].isna()].assign(compute_seconds=lambda d: d["fit_seconds"] + d["predict_seconds"])
+    summary = ok.groupby("model").agg(tickers=("ticker", "nunique"), folds=("fold", "size"), mae=("mae", "mean"),
+                                      rmse=("rmse", "mean"), mape=("mape", "mean"),
+                                      compute_seconds=("compute_seconds", "sum")).sort_values("rmse")
+    timing = dict(wall_seconds=time.perf_counter() - t_start, compute_seconds=float(ok["compute_seconds"].sum()))
+    return folds, summary, timing
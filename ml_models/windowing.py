@@ -0,0 +1,61 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def feature_columns(feature="Close", features=None):
+    """Model input columns with the prediction target first."""
+    return [feature] + [c for c in (features or []) if c != feature]
+
+
+def trim_warmup(data, columns):
+    """
+    `data` from the first row where every column is set, so indicator warm-up NaN (e.g. a 20-bar SMA)
+    never reach the scaler. Later rows are kept, so windows and predictions still end at the last bar.
+    """
+    valid = data[columns].notna().all(axis=1).to_numpy()
+    return data.iloc[valid.argmax():] if valid.any() else data.iloc[:0]
+
+
+def scale_columns(data, columns, scaler=None):
+    """MinMax-scale the columns into one float32 (n, n_features) array; fits a new scaler unless one is given."""
+    values = data[columns].to_numpy(dtype=float)
+    if scaler is None:
+        from sklearn.preprocessing import MinMaxScaler
+        scaler = MinMaxScaler().fit(values)
+    return scaler.transform(values).astype(np.float32), scaler
+
+
+def inverse_target(scaler, values, col=0):
+    """Undo MinMax scaling for the target column only, whatever the scaler's width."""
+    values = np.asarray(values, dtype=float).reshape(-1)
+    return (values - scaler.min_[col]) / scaler.scale_[col]
+
+
+def make_windows(values, lookback, target_col=0):
+    """
+    Next-step training windows without copying the series:
+    X[i] = values[i:i + lookback] and y[i] = values[i + lookback, target_col].
+    X is a read-only strided view of shape (n - lookback, lookback, n_features),
+    so memory stays O(n) however long the lookback is.
+    """
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values[:, None]
+    if len(values) <= lookback:
+        return np.empty((0, lookback, values.shape[1]), dtype=values.dtype), np.empty(0, dtype=values.dtype)
+    X = sliding_window_view(values[:-1], lookback, axis=0).transpose(0, 2, 1)
+    y = values[lookback:, target_col]
+    return X, y
+
+
+def batch_indices(n, batch_size, shuffle=False, seed=None):
+    order = np.random.default_rng(seed).permutation(n) if shuffle else np.arange(n)
+    for i in range(0, n, batch_size):
+        yield order[i:i + batch_size]
+
+
+def iter_batches(X, y=None, batch_size=32, shuffle=False, seed=None):
+    """Yield contiguous mini-batches materialised on demand; only one batch is ever copied."""
+    for idx in batch_indices(len(X), batch_size, shuffle=shuffle, seed=seed):
+        xb = np.ascontiguousarray(X[idx])
+        yield (xb, np.ascontiguousarray(y[idx])) if y is not None else xb
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import data_sources
+from benchmarks.synthetic import random_walk_universe
+
+APP = str(Path(__file__).resolve().parents[1] / "app.py")
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    # synthetic bars instead of provider calls; app.py imports load_many when it runs
+    universe = random_walk_universe(300, 2, start="2024-01-02")
+    monkeypatch.setattr(data_sources, "load_many",
+                        lambda source, tickers, *args, **kwargs: ({t: universe[f"SYN{i:04d}"] for i, t in
+                                                                  enumerate(tickers)}, {}))
+    monkeypatch.chdir(tmp_path)
+    at = AppTest.from_file(APP, default_timeout=120).run()
+    at.sidebar.text_input[0].set_value("AAA, BBB")
+    return at
+
+
+def test_renders_tickers(app):
+    app.run()
+    assert not app.exception
+    assert [h.value for h in app.header][:2] == ["📊 AAA Analysis", "📊 BBB Analysis"]
+
+
+def test_portfolio_backtest(app):
+    app.run()
+    next(c for c in app.checkbox if c.label == "Backtest all tickers as one portfolio").check()
+    app.run()
+    assert not app.exception
+    assert "💼 Portfolio Backtest" in [h.value for h in app.header]
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import random_walk_ohlcv
+from indicators.incremental import IndicatorState
+from indicators.technicals import PANEL_FIELDS, compute_indicators
+
+
+@pytest.mark.parametrize("params", [{}, dict(sma=5, ema=8, rsi=3, macd_fast=4, macd_slow=9, macd_signal=3)])
+def test_updates_match_compute_indicators(params):
+    df = random_walk_ohlcv(300, seed=1)
+    expected = compute_indicators(df, **params)
+    state = IndicatorState(**params)
+    rows = [state.update(close) for close in df["Close"]]
+    for field in PANEL_FIELDS:
+        got = np.array([row[field] for row in rows])
+        assert np.array_equal(got, expected[field].to_numpy(), equal_nan=True), field
+
+
+def test_resumed_state_matches_compute_indicators():
+    df = random_walk_ohlcv(300, seed=2)
+    expected = compute_indicators(df)
+    state = IndicatorState.from_dict(IndicatorState.from_history(df.iloc[:150]).to_dict())
+    rows = [state.update(close) for close in df["Close"].iloc[150:]]
+    for field in PANEL_FIELDS:
+        got = np.array([row[field] for row in rows])
+        assert np.array_equal(got, expected[field].to_numpy()[150:], equal_nan=True), field
@@ -0,0 +1,56 @@
+"""
+Polygon and Finnhub loading against responses recorded from the stubs in benchmarks/mock_servers.py
+(tests/fixtures/providers: 5m bars of AAA for 2024-03-04..06, Polygon paged 100 bars at a time):
+
+    serve_polygon(page_limit=100, record=DIR), serve_finnhub(record=DIR)
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.mock_servers import serve_replay, synthetic_bars
+from data_sources import finnhub, load_many, polygon, store
+from data_sources.scheduler import Scheduler
+
+RECORDED = Path(__file__).parent / "fixtures" / "providers"
+START, END = "2024-03-04", "2024-03-06"
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "DATA_STORE_DIR", str(tmp_path))
+    server, url = serve_replay(str(RECORDED))
+    for module, base in ((polygon, url), (finnhub, url + "/api/v1")):
+        monkeypatch.setattr(module, "BASE_URL", base)
+        monkeypatch.setattr(module, "SCHEDULER", Scheduler(100, per=1.0, backoff=0.1, max_backoff=1.0, max_retries=2))
+    yield server
+    server.shutdown()
+
+
+def _expected():
+    ts, o, h, l, c, v = synthetic_bars("AAA", START, END, minutes=5)
+    index = pd.to_datetime(ts, unit="s", utc=True).tz_convert("America/New_York")
+    return pd.DataFrame({"Open": o, "High": h, "Low": l, "Close": c, "Volume": v}, index=index).round(4)
+
+
+@pytest.mark.parametrize("source, pages", [("polygon", 3), ("finnhub", 1)])
+def test_replayed_bars(replay, source, pages):
+    frames, errors = load_many(source, ["AAA"], START, END, "5m", api_key="demo")
+    assert errors == {}
+    assert replay.stats == {"requests": pages}
+
+    bars, expected = frames["AAA"], _expected()
+    assert list(bars.columns) == COLUMNS
+    assert bars.dtypes.tolist() == [np.float64] * 4 + [np.int64]
+    assert len(bars) == 3 * 78
+    assert bars.index[0] == pd.Timestamp("2024-03-04 09:30", tz="America/New_York")
+    assert bars.index[-1] == pd.Timestamp("2024-03-06 15:55", tz="America/New_York")
+    assert (bars.index == expected.index).all()
+    np.testing.assert_allclose(bars[COLUMNS[:4]].to_numpy(), expected[COLUMNS[:4]].to_numpy(), rtol=1e-12)
+    assert (bars["Volume"] == expected["Volume"]).all()
+    # first rows of Polygon's second and third pages, and the last bar
+    for row in (100, 200, len(bars) - 1):
+        assert bars.iloc[row].tolist() == pytest.approx(expected.iloc[row].tolist(), rel=1e-12)
@@ -0,0 +1,94 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import random_walk_ohlcv
+from data_sources import store, yahoo
+
+DAYS = pd.bdate_range("2024-03-04", "2024-03-08")
+
+
+def _minute_bars(seed=0):
+    """A regular 09:30-16:00 session of 1m bars per day, in exchange time."""
+    index = pd.DatetimeIndex([t for day in DAYS for t in pd.date_range(day + pd.Timedelta("9h30min"),
+                                                                          periods=390, freq="min")])
+    bars = random_walk_ohlcv(len(index), seed=seed)
+    bars.index = index.tz_localize("America/New_York").rename("Datetime")
+    # rounded to float32 like the barstore keeps them, so aggregates compare exactly
+    prices = ["Open", "High", "Low", "Close"]
+    bars[prices] = bars[prices].astype(np.float32).astype(float)
+    return bars
+
+
+class Fetcher:
+    def __init__(self, bars):
+        self.bars, self.calls = bars, []
+
+    def __call__(self, ticker, start, end, interval):
+        self.calls.append((interval, pd.Timestamp(start).date(), pd.Timestamp(end).date()))
+        return store.slice_range(self.bars, pd.Timestamp(start).date(), pd.Timestamp(end).date())
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "DATA_STORE_DIR", str(tmp_path))
+
+
+@pytest.fixture
+def minutes():
+    return _minute_bars()
+
+
+def _store_minutes(provider, minutes):
+    store.load(provider, "AAA", DAYS[0], DAYS[-1], "1m", Fetcher(minutes))
+
+
+def test_settled_days_come_from_finer_bars(minutes):
+    _store_minutes("polygon", minutes)
+    later = pd.DataFrame({"Open": [1.0], "High": [2.0], "Low": [0.5], "Close": [1.5], "Volume": [10]},
+                         index=pd.DatetimeIndex([pd.Timestamp("2024-03-11 09:30", tz="America/New_York")],
+                                                name="Datetime"))
+    fetch = Fetcher(later)
+    bars = store.load("polygon", "AAA", DAYS[0], date(2024, 3, 11), "1h", fetch)
+
+    # only the days the stored minutes do not reach are requested
+    assert fetch.calls == [("1h", date(2024, 3, 9), date(2024, 3, 11))]
+    assert len(bars) == 5 * 7 + 1
+    assert bars.index[-1] == later.index[0]
+
+    first = minutes.loc[minutes.index < pd.Timestamp("2024-03-04 10:30", tz="America/New_York")]
+    assert bars.index[0] == pd.Timestamp("2024-03-04 09:30", tz="America/New_York")
+    assert bars.iloc[0].tolist() == [first["Open"].iloc[0], first["High"].max(), first["Low"].min(),
+                                     first["Close"].iloc[-1], first["Volume"].sum()]
+    # hour buckets follow the session open, the last one being the half hour from 15:30
+    assert list(bars.index[:7].strftime("%H:%M")) == ["09:30", "10:30", "11:30", "12:30", "13:30", "14:30", "15:30"]
+    assert bars["Volume"].iloc[:7].sum() == minutes["Volume"].iloc[:390].sum()
+
+
+def test_covered_range_fetches_nothing(minutes):
+    _store_minutes("polygon", minutes)
+    fetch = Fetcher(minutes)
+    bars = store.load("polygon", "AAA", DAYS[1], DAYS[2], "15m", fetch)
+    assert fetch.calls == []
+    assert len(bars) == 2 * 26
+    assert bars["Volume"].sum() == minutes["Volume"].iloc[390:3 * 390].sum()
+
+
+def test_yahoo_daily_is_not_built_from_unadjusted_intraday(minutes):
+    _store_minutes("yahoo", minutes)
+    daily = pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": 1.5, "Volume": 10}, index=DAYS.rename("Date"))
+    fetch = Fetcher(daily)
+    bars = store.load("yahoo", "AAA", DAYS[0], DAYS[-1] + pd.Timedelta(days=1), "1d", fetch, end_inclusive=False)
+    assert fetch.calls == [("1d", DAYS[0].date(), (DAYS[-1] + pd.Timedelta(days=1)).date())]
+    assert bars["Close"].tolist() == [1.5] * 5
+
+
+def test_yahoo_load_many_resamples_intraday(minutes, monkeypatch):
+    _store_minutes("yahoo", minutes)
+    calls = []
+    monkeypatch.setattr(yahoo, "_fetch_many", lambda *args: calls.append(args) or ({}, {}))
+    frames, errors = yahoo.load_many(["AAA"], DAYS[0], DAYS[-1] + pd.Timedelta(days=1), "1h")
+    assert calls == [] and errors == {}
+    assert len(frames["AAA"]) == 5 * 7
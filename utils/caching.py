@@ -0,0 +1,22 @@
+import functools
+import sys
+
+
+def cache_data(func):
+    """
+    streamlit.cache_data when the Streamlit app is running, a plain call everywhere else.
+    Streamlit is never imported from here, so the data loaders work in CLI jobs and worker processes.
+    """
+    cached = None
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        nonlocal cached
+        st = sys.modules.get("streamlit")
+        if st is None:
+            return func(*args, **kwargs)
+        if cached is None:
+            cached = st.cache_data(func)
+        return cached(*args, **kwargs)
+
+    return wrapper
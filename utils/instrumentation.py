@@ -0,0 +1,293 @@
+"""
+Lightweight per-stage timing, memory and cache instrumentation.
+
+Disabled by default (set MTA_PERF=1 or call enable()); a disabled @instrument costs one context
+variable lookup per call. When enabled every stage records wall time, rows processed, optional peak
+traced allocation and cache hits/misses, emits one JSON log line on the "market_trend.perf"
+logger, and can be exported as Prometheus text (to_prometheus / serve_prometheus).
+
+The enabled flag and the records live in a Recorder. Processes share one by default; concurrent
+sessions (e.g. Streamlit's) each keep their own in session state and activate it with use().
+"""
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import deque
+
+logger = logging.getLogger("market_trend.perf")
+
+MAX_RECORDS = 10_000
+
+_lock = threading.Lock()
+_local = threading.local()
+# recorders tracking memory; tracemalloc is process-wide, so it is only stopped once none is left
+# and only if this module started it
+_tracing = weakref.WeakSet()
+_started_tracing = False
+
+
+class Recorder:
+    """Enabled flag, memory tracking and records of one session."""
+
+    def __init__(self, enabled=False, max_records=MAX_RECORDS):
+        self.enabled, self.track_memory = bool(enabled), False
+        self.records = deque(maxlen=max_records)
+        self.lock = threading.Lock()
+
+
+_current = contextvars.ContextVar("recorder", default=Recorder(os.environ.get("MTA_PERF", "") not in ("", "0")))
+
+
+def use(recorder):
+    """Record into `recorder` for the rest of this thread (or context); returns it."""
+    _current.set(recorder)
+    return recorder
+
+
+def current():
+    return _current.get()
+
+
+def _set_tracking(recorder, on):
+    global _started_tracing
+    with _lock:
+        recorder.track_memory = on
+        if on:
+            _tracing.add(recorder)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _started_tracing = True
+        else:
+            _tracing.discard(recorder)
+            if _started_tracing and not _tracing:
+                tracemalloc.stop()
+                _started_tracing = False
+
+
+def enable(track_memory=False):
+    """Start recording; track_memory also traces allocations (tracemalloc slows Python code down noticeably)."""
+    recorder = _current.get()
+    recorder.enabled = True
+    _set_tracking(recorder, bool(track_memory))
+
+
+def disable():
+    recorder = _current.get()
+    recorder.enabled = False
+    _set_tracking(recorder, False)
+
+
+def is_enabled():
+    return _current.get().enabled
+
+
+def reset():
+    recorder = _current.get()
+    with recorder.lock:
+        recorder.records.clear()
+
+
+def set_ticker(ticker):
+    """Default ticker for stages recorded on this thread that do not name one themselves."""
+    _local.ticker = ticker
+
+
+def _emit(recorder, rec):
+    with recorder.lock:
+        recorder.records.append(rec)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(rec, default=str))
+
+
+def _rows(obj):
+    shape = getattr(obj, "shape", None)
+    if shape:
+        return int(shape[0])
+    if isinstance(obj, (list, tuple, dict)):
+        return len(obj)
+    return None
+
+
+class stage:
+    """
+    Context manager timing one pipeline stage:
+
+        with stage("fetch", ticker="AAPL") as s:
+            df = load(...)
+            s.rows = len(df)
+    """
+
+    def __init__(self, name, ticker=None, rows=None):
+        self.name, self.rows = name, rows
+        self.ticker = ticker if ticker is not None else getattr(_local, "ticker", None)
+        self.active = False
+
+    def __enter__(self):
+        self.recorder = _current.get()
+        if not self.recorder.enabled:
+            return self
+        self.active = True
+        self.child_peak = 0
+        self.memory = self.recorder.track_memory and tracemalloc.is_tracing()
+        if self.memory:
+            self.base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            stack = getattr(_local, "stack", None)
+            if stack is None:
+                stack = _local.stack = []
+            stack.append(self)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.active:
+            return False
+        seconds = time.perf_counter() - self.t0
+        peak_bytes = None
+        if self.memory:
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self.child_peak)
+            peak_bytes = max(0, peak - self.base)
+            stack = _local.stack
+            stack.pop()
+            if stack:
+                # reset_peak() above hid this allocation from the enclosing stage; hand it up
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+        _emit(self.recorder, {"kind": "stage", "stage": self.name, "ticker": self.ticker, "seconds": seconds,
+               "rows": self.rows, "peak_bytes": peak_bytes, "error": exc_type.__name__ if exc_type else None,
+               "ts": time.time()})
+        return False
+
+
+def instrument(name=None, ticker_arg="ticker", rows_arg=0):
+    """
+    Decorator wrapping a function in stage(). Rows are taken from the argument at position or
+    name `rows_arg` (frames, arrays and lists), falling back to the length of the returned frame.
+    """
+
+    def decorate(func):
+        label = name or func.__name__
+        params = list(inspect.signature(func).parameters)
+        ticker_pos = params.index(ticker_arg) if ticker_arg in params else None
+        rows_pos = params.index(rows_arg) if isinstance(rows_arg, str) else rows_arg
+        rows_name = params[rows_pos] if rows_pos is not None and rows_pos < len(params) else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _current.get().enabled:
+                return func(*args, **kwargs)
+            ticker = kwargs.get(ticker_arg)
+            if ticker is None and ticker_pos is not None and ticker_pos < len(args):
+                ticker = args[ticker_pos]
+            rows = None
+            if rows_pos is not None:
+                rows = _rows(args[rows_pos] if rows_pos < len(args) else kwargs.get(rows_name))
+            with stage(label, ticker=ticker, rows=rows) as s:
+                result = func(*args, **kwargs)
+                if s.rows is None:
+                    s.rows = _rows(result)
+                return result
+
+        return wrapper
+
+    return decorate
+
+
+def record_cache(cache, hit, ticker=None):
+    """Count one lookup in a named cache; `hit` may also be a string outcome such as 'fine_tune'."""
+    recorder = _current.get()
+    if not recorder.enabled:
+        return
+    result = hit if isinstance(hit, str) else ("hit" if hit else "miss")
+    ticker = ticker if ticker is not None else getattr(_local, "ticker", None)
+    _emit(recorder, {"kind": "cache", "cache": cache, "result": result, "ticker": ticker, "ts": time.time()})
+
+
+def records(recorder=None):
+    recorder = recorder or _current.get()
+    with recorder.lock:
+        return list(recorder.records)
+
+
+def summary(recorder=None):
+    """Aggregates per stage and per cache as a list of dicts (ready for pd.DataFrame)."""
+    stages, caches = {}, {}
+    for rec in records(recorder):
+        if rec["kind"] == "stage":
+            s = stages.setdefault(rec["stage"], {"stage": rec["stage"], "calls": 0, "seconds": 0.0,
+                                                 "max_seconds": 0.0, "rows": 0, "peak_bytes": None, "errors": 0})
+            s["calls"] += 1
+            s["seconds"] += rec["seconds"]
+            s["max_seconds"] = max(s["max_seconds"], rec["seconds"])
+            s["rows"] += rec["rows"] or 0
+            s["errors"] += rec["error"] is not None
+            if rec["peak_bytes"] is not None:
+                s["peak_bytes"] = max(s["peak_bytes"] or 0, rec["peak_bytes"])
+        else:
+            c = caches.setdefault(rec["cache"], {"stage": f"cache:{rec['cache']}", "calls": 0})
+            c["calls"] += 1
+            c[rec["result"]] = c.get(rec["result"], 0) + 1
+    return sorted(stages.values(), key=lambda s: -s["seconds"]) + list(caches.values())
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def to_prometheus(prefix="mta", recorder=None):
+    """Prometheus text exposition of everything recorded so far."""
+    stages, caches = {}, {}
+    for rec in records(recorder):
+        if rec["kind"] == "stage":
+            s = stages.setdefault(rec["stage"], [0, 0.0, 0, 0])
+            s[0] += 1
+            s[1] += rec["seconds"]
+            s[2] += rec["rows"] or 0
+            s[3] = max(s[3], rec["peak_bytes"] or 0)
+        else:
+            key = (rec["cache"], rec["result"], rec["ticker"])
+            caches[key] = caches.get(key, 0) + 1
+
+    lines = []
+    for metric, kind, idx, help_text in (
+        ("stage_calls_total", "counter", 0, "Calls per pipeline stage"),
+        ("stage_seconds_total", "counter", 1, "Wall time spent per pipeline stage"),
+        ("stage_rows_total", "counter", 2, "Rows processed per pipeline stage"),
+        ("stage_peak_bytes", "gauge", 3, "Largest traced allocation peak seen per stage"),
+    ):
+        lines += [f"# HELP {prefix}_{metric} {help_text}", f"# TYPE {prefix}_{metric} {kind}"]
+        lines += [f'{prefix}_{metric}{{stage="{_label(name)}"}} {values[idx]}' for name, values in sorted(stages.items())]
+    lines += [f"# HELP {prefix}_cache_requests_total Cache lookups by outcome and ticker",
+              f"# TYPE {prefix}_cache_requests_total counter"]
+    lines += [f'{prefix}_cache_requests_total{{cache="{_label(c)}",result="{_label(r)}",ticker="{_label(t or "")}"}} {n}'
+              for (c, r, t), n in sorted(caches.items(), key=lambda kv: tuple(str(k) for k in kv[0]))]
+    return "\n".join(lines) + "\n"
+
+
+def serve_prometheus(port=9108, addr="127.0.0.1", recorder=None):
+    """Serve to_prometheus() of `recorder` (default: the current one) at http://addr:port/metrics from a thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    recorder = recorder or _current.get()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = to_prometheus(recorder=recorder).encode()
+            self.send_response(200 if self.path in ("/", "/metrics") else 404)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,33 +1,52 @@
+import hashlib
+from collections import OrderedDict
+
+import pandas as pd
 import plotly.graph_objs as go
+from config.settings import PLOT_WIDTH_PX, PLOT_WEBGL_THRESHOLD
+from utils.downsample import lttb_indices, downsample_ohlc
+from utils.instrumentation import instrument, record_cache
+
+FIGURE_CACHE_SIZE = 32
+_figure_cache = OrderedDict()
+
+def _line(x, y, width_px, name, line):
+    """Scatter trace thinned with LTTB to ~2 points per pixel, switched to WebGL when still large."""
+    if width_px and len(y) > 2 * width_px:
+        idx = lttb_indices(x, y, 2 * width_px)
+        x, y = x[idx], y.iloc[idx]
+    trace = go.Scattergl if len(y) > PLOT_WEBGL_THRESHOLD else go.Scatter
+    return trace(x=x, y=y, name=name, line=line)
 
-def plot_price(data, sma_window=None, ema_window=None):
+@instrument()
+def plot_price(data, sma_window=None, ema_window=None, width_px=PLOT_WIDTH_PX):
     fig = go.Figure()
     if set(['Open','High','Low','Close']).issubset(data.columns):
+        candles = downsample_ohlc(data, width_px // 2) if width_px else data
         fig.add_trace(go.Candlestick(
-            x=data.index, open=data['Open'], high=data['High'],
-            low=data['Low'], close=data['Close'], name='Price'
+            x=candles.index, open=candles['Open'], high=candles['High'],
+            low=candles['Low'], close=candles['Close'], name='Price'
         ))
     else:
-        fig.add_trace(go.Scatter(x=data.index, y=data['Close'], name='Close', line=dict(color="#00ffcc", width=2)))
+        fig.add_trace(_line(data.index, data['Close'], width_px, 'Close', dict(color="#00ffcc", width=2)))
 
     if 'SMA' in data.columns:
-        fig.add_trace(go.Scatter(x=data.index, y=data['SMA'],
-                                 line=dict(color="#39ff14", width=2),
-                                 name=f"SMA {sma_window}" if sma_window else 'SMA'))
+        fig.add_trace(_line(data.index, data['SMA'], width_px,
+                            f"SMA {sma_window}" if sma_window else 'SMA', dict(color="#39ff14", width=2)))
     if 'EMA' in data.columns:
-        fig.add_trace(go.Scatter(x=data.index, y=data['EMA'],
-                                 line=dict(color="#00f9ff", width=2, dash="dot"),
-                                 name=f"EMA {ema_window}" if ema_window else 'EMA'))
+        fig.add_trace(_line(data.index, data['EMA'], width_px,
+                            f"EMA {ema_window}" if ema_window else 'EMA', dict(color="#00f9ff", width=2, dash="dot")))
 
     fig.update_layout(template="plotly_dark", plot_bgcolor="#000", paper_bgcolor="#000",
                       font=dict(color="white"), margin=dict(l=10,r=10,t=30,b=10),
                       height=500, xaxis_rangeslider_visible=False)
     return fig
 
-def plot_rsi(data, rsi_window=14):
+@instrument()
+def plot_rsi(data, rsi_window=14, width_px=PLOT_WIDTH_PX):
     fig = go.Figure()
     if 'RSI' in data.columns:
-        fig.add_trace(go.Scatter(x=data.index, y=data['RSI'], name=f'RSI {rsi_window}', line=dict(color="#ff073a", width=2)))
+        fig.add_trace(_line(data.index, data['RSI'], width_px, f'RSI {rsi_window}', dict(color="#ff073a", width=2)))
         fig.add_hline(y=70, line_dash='dot', line_color="#aaaaaa")
         fig.add_hline(y=30, line_dash='dot', line_color="#aaaaaa")
     fig.update_layout(template="plotly_dark", plot_bgcolor="#000", paper_bgcolor="#000",
@@ -35,22 +54,59 @@ def plot_rsi(data, rsi_window=14):
                       height=250, xaxis_rangeslider_visible=False)
     return fig
 
-def plot_macd(data):
+@instrument()
+def plot_macd(data, width_px=PLOT_WIDTH_PX):
     fig = go.Figure()
     if {'MACD','MACD_signal','MACD_hist'}.issubset(data.columns):
-        fig.add_trace(go.Scatter(x=data.index, y=data['MACD'], name='MACD', line=dict(color="#ff00ff", width=2)))
-        fig.add_trace(go.Scatter(x=data.index, y=data['MACD_signal'], name='Signal', line=dict(color="#00f9ff", width=2, dash="dot")))
-        fig.add_trace(go.Bar(x=data.index, y=data['MACD_hist'], name='Hist', marker_color="#39ff14"))
+        fig.add_trace(_line(data.index, data['MACD'], width_px, 'MACD', dict(color="#ff00ff", width=2)))
+        fig.add_trace(_line(data.index, data['MACD_signal'], width_px, 'Signal', dict(color="#00f9ff", width=2, dash="dot")))
+        hist = data['MACD_hist']
+        if width_px and len(hist) > width_px:
+            hist = hist.iloc[lttb_indices(hist.index, hist, width_px)]
+        fig.add_trace(go.Bar(x=hist.index, y=hist, name='Hist', marker_color="#39ff14"))
     fig.update_layout(template="plotly_dark", plot_bgcolor="#000", paper_bgcolor="#000",
                       font=dict(color="white"), margin=dict(l=10,r=10,t=30,b=10),
                       height=300, xaxis_rangeslider_visible=False, barmode='relative')
     return fig
 
-def plot_equity(bt):
+@instrument()
+def plot_equity(bt, width_px=PLOT_WIDTH_PX):
     fig = go.Figure()
     if 'equity' in bt.columns:
-        fig.add_trace(go.Scatter(x=bt.index, y=bt['equity'], name='Equity Curve', line=dict(color="#39ff14", width=2)))
+        fig.add_trace(_line(bt.index, bt['equity'], width_px, 'Equity Curve', dict(color="#39ff14", width=2)))
     fig.update_layout(template="plotly_dark", plot_bgcolor="#000", paper_bgcolor="#000",
                       font=dict(color="white"), margin=dict(l=10,r=10,t=30,b=10),
                       height=350, xaxis_rangeslider_visible=False)
     return fig
+
+@instrument()
+def plot_sweep_heatmap(sweep, metric='sharpe'):
+    fig = go.Figure()
+    if {'fast_ma','slow_ma',metric}.issubset(sweep.columns) and not sweep.empty:
+        grid = sweep.pivot_table(index='fast_ma', columns='slow_ma', values=metric)
+        fig.add_trace(go.Heatmap(z=grid.values, x=grid.columns, y=grid.index, colorscale="Viridis",
+                                 colorbar=dict(title=metric), name=metric))
+    fig.update_layout(template="plotly_dark", plot_bgcolor="#000", paper_bgcolor="#000",
+                      font=dict(color="white"), margin=dict(l=10,r=10,t=30,b=10),
+                      height=450, xaxis_title="Slow MA", yaxis_title="Fast MA")
+    return fig
+
+def data_fingerprint(data):
+    """Content hash of a frame (index, columns and values)."""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    digest.update(repr(list(data.columns)).encode())
+    return digest.hexdigest()
+
+def cached_figure(plot_fn, data, *args, **kwargs):
+    """plot_fn(data, *args, **kwargs), reusing the figure built for the same data and window params."""
+    key = (plot_fn.__name__, data_fingerprint(data), args, tuple(sorted(kwargs.items())))
+    fig = _figure_cache.get(key)
+    record_cache("figure", fig is not None)
+    if fig is None:
+        fig = plot_fn(data, *args, **kwargs)
+        _figure_cache[key] = fig
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+    else:
+        _figure_cache.move_to_end(key)
+    return fig